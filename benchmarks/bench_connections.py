@@ -0,0 +1,82 @@
+import sqlite3
+import random
+import argparse
+import datetime
+
+from common import parse_args, report, measure, scratch_database, sentence, stopwatch
+import veritabani as V
+
+def per_call_read(sql, params):
+    conn = sqlite3.connect(V.DATABASE_NAME)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+def per_call_write(sql, params):
+    conn = sqlite3.connect(V.DATABASE_NAME)
+    try:
+        conn.execute(sql, params)
+        conn.commit()
+    finally:
+        conn.close()
+
+def fill(entries, users):
+    start = datetime.datetime(2015, 1, 1)
+    with V.get_db().transaction() as cursor:
+        for i in range(users):
+            cursor.execute("INSERT INTO users (username, password_hash, name, surname) VALUES (?, ?, '', '')",
+                           (f"u{i}", V.hash_password("pw")))
+            cursor.execute("INSERT INTO user_preferences (user_id, theme_color, city) VALUES (?, 'Mavi', 'Istanbul')",
+                           (cursor.lastrowid,))
+        cursor.executemany("INSERT INTO diary_entries (user_id, entry_date, title, content, mood, is_important) "
+                           "VALUES (?, ?, ?, ?, NULL, 0)",
+                           ((i % users + 1, (start + datetime.timedelta(minutes=53 * i)).strftime("%Y-%m-%d %H:%M:%S"),
+                             sentence(random, 2, 5), sentence()) for i in range(entries)))
+        cursor.executemany("INSERT INTO health_data (user_id, log_date, water_ml, exercise_km, sleep_hours) VALUES (?, ?, 1500, 2.0, 7.0)",
+                           ((1, (start + datetime.timedelta(days=day)).date().isoformat()) for day in range(3650)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Çağrı başına bağlantı ile havuzlanmış bağlantının gecikmesini karşılaştırır")
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parse_args(parser, argv)
+
+    with scratch_database():
+        V.init_db()
+        with stopwatch(f"{args.entries} girdi yazıldı"):
+            fill(args.entries, args.users)
+        entry_ids = [row[0] for row in V.get_db().execute("SELECT id FROM diary_entries WHERE user_id = 1 LIMIT 1000")]
+        dates = [(datetime.date(2015, 1, 1) + datetime.timedelta(days=day)).isoformat() for day in range(3650)]
+
+        cases = [
+            ("check_user", lambda: per_call_read(V.USER_LOGIN_SQL, ("u0",)), lambda: V.check_user("u0", "pw")),
+            ("get_user_preference",
+             lambda: per_call_read("SELECT city FROM user_preferences WHERE user_id = ?", (1,)),
+             lambda: V.get_user_preference(1, "city")),
+            ("get_diary_entry_by_id",
+             lambda: per_call_read(V.DIARY_ENTRY_SQL, (random.choice(entry_ids),)),
+             lambda: V.get_diary_entry_by_id(random.choice(entry_ids))),
+            ("get_diary_entries_page",
+             lambda: per_call_read(V.DIARY_FIRST_PAGE_SQL, (1, V.DIARY_PAGE_SIZE)),
+             lambda: V.get_diary_entries_page(1)),
+            ("get_health_log",
+             lambda: per_call_read(V.HEALTH_LOG_SQL, (1, random.choice(dates))),
+             lambda: V.get_health_log(1, random.choice(dates))),
+            ("update_health_log",
+             lambda: per_call_write(V.HEALTH_UPSERT_SQL, (2, random.choice(dates), 1000, 1.0, 8.0)),
+             lambda: V.update_health_log(2, random.choice(dates), 1000, 1.0, 8.0)),
+            ("add_diary_entry",
+             lambda: per_call_write("INSERT INTO diary_entries (user_id, entry_date, title, content, mood, is_important) "
+                                    "VALUES (3, '2026-01-01 00:00:00', 'b', 'ölçüm', NULL, 0)", ()),
+             lambda: V.add_diary_entry(3, "b", "ölçüm", None, False)),
+        ]
+        print(f"{'':<44} (önce: çağrı başına sqlite3.connect, varsayılan PRAGMA'lar / sonra: ConnectionManager)")
+        for name, before, after in cases:
+            slow = report(f"{name} önce", measure(before, args.repeat))
+            fast = report(f"{name} sonra", measure(after, args.repeat))
+            print(f"{'':<44} hızlanma x{slow / fast:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import random
+import argparse
+import datetime
+
+from common import VOCABULARY, parse_args, report, measure, scratch_database, sentence, stopwatch
+import veritabani as V
+
+QUERIES = ["bugün", "ışık", "isik", "yağmurlu akşam", VOCABULARY[400], VOCABULARY[2500], VOCABULARY[4000][:4],
+           f"{VOCABULARY[300]} {VOCABULARY[900]}"]
+LIKE_SQL = ("SELECT id, entry_date, title, mood, is_important, SUBSTR(content, 1, 50) FROM diary_entries "
+            "WHERE user_id = ? AND (title LIKE ? OR content LIKE ?) ORDER BY entry_date DESC LIMIT ?")
+
+def fill(entries, users):
+    start = datetime.datetime(2015, 1, 1)
+
+    def rows():
+        for i in range(entries):
+            entry_date = (start + datetime.timedelta(minutes=17 * i)).strftime("%Y-%m-%d %H:%M:%S")
+            yield (i % users + 1, entry_date, sentence(random, 2, 5), sentence(), None, 0)
+
+    with V.get_db().transaction() as cursor:
+        cursor.executemany("INSERT INTO users (username, password_hash) VALUES (?, '')", ((f"u{i}",) for i in range(users)))
+        cursor.executemany("INSERT INTO diary_entries (user_id, entry_date, title, content, mood, is_important) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", rows())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FTS5 günlük araması ile LIKE taramasını karşılaştırır")
+    parser.add_argument("--entries", type=int, default=500_000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=V.MIGRATION_BATCH_SIZE)
+    args = parse_args(parser, argv)
+
+    with scratch_database():
+        V.run_migrations(include_online=False)
+        with stopwatch(f"{args.entries} girdi yazıldı"):
+            fill(args.entries, args.users)
+        with stopwatch("Arama dizini oluşturuldu (göç 3)"):
+            for _ in V._migration_003_diary_search_index(V.get_db(), args.batch_size):
+                pass
+        V.run_migrations()
+
+        for query in QUERIES:
+            fts = report(f"FTS5  '{query}'", measure(V.search_diary_entries, args.repeat, 1, query))
+            pattern = f"%{query.split()[0]}%"
+            like = report(f"LIKE  '{query.split()[0]}'", measure(
+                lambda: V.get_db().execute(LIKE_SQL, (1, pattern, pattern, V.DIARY_PAGE_SIZE)).fetchall(), args.repeat))
+            print(f"{'':<44} hızlanma x{like / fts:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import random
+import argparse
+import datetime
+from contextlib import contextmanager
+
+from common import parse_args, report, measure, scratch_database, stopwatch
+import veritabani as V
+
+END_DATE = datetime.date(2025, 12, 31)
+WATER_GOAL = 2000
+
+@contextmanager
+def numpy_disabled():
+    saved = V.np, V._numpy_loaded
+    V.np, V._numpy_loaded = None, True
+    try:
+        yield
+    finally:
+        V.np, V._numpy_loaded = saved
+
+def fill(users, days, skip_rate):
+    start = END_DATE - datetime.timedelta(days=days - 1)
+
+    def rows():
+        for user_id in range(1, users + 1):
+            for offset in range(days):
+                if random.random() >= skip_rate:
+                    yield (user_id, (start + datetime.timedelta(days=offset)).isoformat(), random.randint(500, 3500),
+                           round(random.uniform(0, 10), 1), round(random.uniform(4, 10), 1))
+
+    with V.get_db().transaction() as cursor:
+        cursor.executemany("INSERT INTO users (username, password_hash) VALUES (?, '')", ((f"u{i}",) for i in range(users)))
+        cursor.executemany("INSERT INTO health_data (user_id, log_date, water_ml, exercise_km, sleep_hours) VALUES (?, ?, ?, ?, ?)",
+                           rows())
+
+def analyse(user_ids, days):
+    start = END_DATE - datetime.timedelta(days=days - 1)
+    for user_id in user_ids:
+        V.summarize_health(V.load_health_series(user_id, start, END_DATE), WATER_GOAL)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sağlık analizini çok kullanıcılı, uzun süreli verilerde ölçer")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--skip-rate", type=float, default=0.1, help="Kayıt girilmeyen günlerin oranı")
+    parser.add_argument("--sample", type=int, default=50, help="Analiz edilen kullanıcı sayısı")
+    parser.add_argument("--workers", type=int, default=V.HEALTH_ROLLUP_WORKERS)
+    args = parse_args(parser, argv)
+    days = args.years * 365
+
+    with scratch_database():
+        V.run_migrations(include_online=False)
+        with stopwatch(f"{args.users} kullanıcı x {days} gün yazıldı"):
+            fill(args.users, days, args.skip_rate)
+        with stopwatch("Özet tabloları dolduruldu (göç 5)"):
+            V.run_migrations()
+        rows = V.get_db().execute("SELECT COUNT(*) FROM health_data").fetchone()[0]
+        print(f"{'health_data satırı':<44} {rows:10d}")
+
+        sample = random.sample(range(1, args.users + 1), min(args.sample, args.users))
+        for label, span in (("10 yıl", days), ("1 yıl", 365), ("30 gün", 30)):
+            span = min(span, days)
+            report(f"load_health_series {label}", measure(lambda: [V.load_health_series(
+                user_id, END_DATE - datetime.timedelta(days=span - 1), END_DATE) for user_id in sample], 1))
+            if V._load_numpy() is not None:
+                report(f"yükle + summarize_health {label} (NumPy)", measure(analyse, 3, sample, span))
+            with numpy_disabled():
+                report(f"yükle + summarize_health {label} (array)", measure(analyse, 3, sample, span))
+        for period in V.HEALTH_ROLLUP_PERIODS:
+            report(f"get_health_rollups {period} (tüm dönem)",
+                   measure(lambda: [V.get_health_rollups(user_id, period) for user_id in sample], 3))
+        print(f"{'':<44} (kullanıcı başına ölçüm = süre / {len(sample)})")
+        with stopwatch(f"rebuild_health_rollups ({args.workers} iş parçacığı)"):
+            V.rebuild_health_rollups(args.workers)
+        with stopwatch("check_health_rollups"):
+            mismatches = V.check_health_rollups(args.workers)
+        print(f"{'tutarsızlık':<44} {len(mismatches):10d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import random
+import socket
+import datetime
+import argparse
+import subprocess
+import statistics
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from common import parse_args, scratch_database, sentence
+import veritabani as V
+
+USERNAME, PASSWORD = "acilis", "pw"
+
+def closed_port_url():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+def prepare(entries):
+    V.init_db()
+    V.add_user(USERNAME, PASSWORD, "Açılış", "Ölçüm")
+    user = V.check_user(USERNAME, PASSWORD)
+    V.save_user_preference(user["id"], "api_key", "anahtar")
+    for _ in range(entries):
+        V.add_diary_entry(user["id"], sentence(min_words=2, max_words=5), sentence(), "Mutlu", random.random() < 0.1)
+    today = datetime.date.today()
+    for day in range(entries):
+        log_date = (today - datetime.timedelta(days=day)).isoformat()
+        V.update_health_log(user["id"], log_date, random.randint(500, 3000), round(random.uniform(0, 10), 1), 7.0)
+    V.get_db().close_all()
+
+def child(database, eager):
+    """Runs main() once and prints the milliseconds until the App window first paints."""
+    V.DATABASE_NAME = database
+    import hava_durumu as H
+    base = closed_port_url()
+    H.WEATHER_BASE_URL = f"{base}/data/2.5/weather?"
+    H.WEATHER_GROUP_URL = f"{base}/data/2.5/group?"
+    H.WEATHER_FORECAST_URL = f"{base}/data/2.5/forecast?"
+    H.WEATHER_ICON_URL = base + "/img/{icon_code}.png"
+
+    from PyQt5.QtCore import QEvent, QTimer
+    from PyQt5.QtWidgets import QApplication, QDialog
+    import kişiselAsistanım as K
+
+    marks = {}
+
+    class FirstFrameApplication(QApplication):
+        def notify(self, receiver, event):
+            if event.type() == QEvent.Paint and "first_frame" not in marks and isinstance(receiver, K.App):
+                result = super().notify(receiver, event)
+                marks["first_frame"] = time.perf_counter()
+                QTimer.singleShot(0, self.quit)
+                return result
+            return super().notify(receiver, event)
+
+    def accept_login(dialog):
+        dialog.user_data = V.check_user(USERNAME, PASSWORD)
+        return QDialog.Accepted
+
+    build_ui = K.App.init_ui
+
+    def build_ui_eagerly(window):
+        # The layout before lazy tabs: every tab built and the current tab loaded before the first paint.
+        build_ui(window)
+        for tab in list(window._pending_tab_builders):
+            window.ensure_tab_built(tab)
+        window.on_tab_changed(window.tabs.currentIndex())
+
+    K.QApplication = FirstFrameApplication
+    K.LoginDialog.exec_ = accept_login
+    if eager:
+        K.App.init_ui = build_ui_eagerly
+
+    started = time.perf_counter()
+    try:
+        K.main()
+    except SystemExit:
+        pass
+    print(f"{(marks['first_frame'] - started) * 1000:.3f}")
+
+def run_children(database, runs, eager):
+    command = [sys.executable, os.path.abspath(__file__), "--child", database] + (["--eager"] if eager else [])
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(command, capture_output=True, text=True, check=True, timeout=60).stdout
+        samples.append(float(output.split()[-1]))
+    return samples
+
+def summarize(label, samples):
+    median = statistics.median(samples)
+    print(f"{label:<44} p50 {median:9.3f} ms   min {min(samples):9.3f} ms   n={len(samples)}")
+    return median
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="main() çağrısından ilk kareye kadar geçen açılış süresini ölçer")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--entries", type=int, default=500, help="Günlük ve sağlık kaydı sayısı")
+    parser.add_argument("--budget-ms", type=float, default=60.0, help="Tembel açılışın medyanı bu süreyi aşarsa çıkış kodu 1 olur")
+    parser.add_argument("--child", metavar="DATABASE", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parse_args(parser, argv)
+    if args.child:
+        child(args.child, args.eager)
+        return 0
+
+    with scratch_database() as database:
+        prepare(args.entries)
+        run_children(database, 1, eager=False)
+        eager = summarize("tüm sekmeler önceden kurulu (eski yol)", run_children(database, args.runs, eager=True))
+        lazy = summarize("sekmeler ilk açılışta kurulur", run_children(database, args.runs, eager=False))
+    print(f"{'hızlanma':<44} x{eager / lazy:.1f}")
+    if lazy > args.budget_ms:
+        print(f"Açılış süresi bütçeyi aştı: {lazy:.1f} ms > {args.budget_ms:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import os
+import random
+import socket
+import argparse
+import itertools
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from common import parse_args, report, measure, scratch_database, sentence
+import veritabani as V
+import hava_durumu as H
+
+from PyQt5.QtWidgets import QApplication
+
+import kişiselAsistanım as K
+
+def closed_port_url():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{probe.getsockname()[1]}"
+
+def build_app(entries):
+    V.init_db()
+    V.add_user("tema", "pw", "Tema", "Ölçüm")
+    user = V.check_user("tema", "pw")
+    V.save_user_preference(user["id"], "api_key", "anahtar")
+    for _ in range(entries):
+        V.add_diary_entry(user["id"], sentence(min_words=2, max_words=5), sentence(), "Mutlu", random.random() < 0.1)
+    window = K.App(user)
+    for tab in list(window._pending_tab_builders):
+        window.ensure_tab_built(tab)
+    window.show()
+    QApplication.processEvents()
+    return window
+
+def settle(window):
+    QApplication.processEvents()
+    window.repaint()
+
+def switch_uncached(window, name):
+    # The previous path: render the QSS on every switch and save the choice synchronously.
+    window.setStyleSheet(K.render_theme_stylesheet(K.THEME_PALETTES[name]))
+    window.preferences.theme_color = name
+    window.current_theme_color_name = name
+    settle(window)
+
+def switch_cached(window, name):
+    window.apply_theme_color(name)
+    settle(window)
+
+def switch_application_wide(window, name):
+    QApplication.instance().setStyleSheet(K.theme_stylesheets.get(name))
+    settle(window)
+
+def timed_switches(switch, window, names, count):
+    # Start one past the active theme so that no sample is a no-op switch.
+    cycle = itertools.islice(itertools.cycle(names[1:] + names[:1]), count)
+    return [sample for name in cycle for sample in measure(switch, 1, window, name)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tamamen kurulmuş pencerede tema değiştirme gecikmesini ölçer")
+    parser.add_argument("--switches", type=int, default=100)
+    parser.add_argument("--entries", type=int, default=500, help="Günlüklerim tablosundaki kayıt sayısı")
+    args = parse_args(parser, argv)
+
+    base = closed_port_url()
+    H.WEATHER_BASE_URL = f"{base}/data/2.5/weather?"
+    H.WEATHER_GROUP_URL = f"{base}/data/2.5/group?"
+    H.WEATHER_FORECAST_URL = f"{base}/data/2.5/forecast?"
+    H.WEATHER_ICON_URL = base + "/img/{icon_code}.png"
+
+    app = QApplication.instance() or QApplication([])
+    names = list(K.THEME_PALETTES)
+    with scratch_database():
+        window = build_app(args.entries)
+        try:
+            report("render_theme_stylesheet", measure(lambda: [K.render_theme_stylesheet(p) for p in K.THEME_PALETTES.values()],
+                                                      max(1, args.switches // len(names))))
+            print(f"{'':<44} ({len(names)} tema başına toplam)")
+            K.theme_stylesheets = K.ThemeStylesheetCache()
+            report("ilk geçiş (bellek önbelleği boş)", timed_switches(switch_cached, window, names, len(names)))
+            report("her geçişte QSS üret (eski yol)", timed_switches(switch_uncached, window, names, args.switches))
+            report("apply_theme_color (önbellekli)", timed_switches(switch_cached, window, names, args.switches))
+            window.setStyleSheet("")
+            report("QApplication.setStyleSheet", timed_switches(switch_application_wide, window, names, args.switches))
+            app.setStyleSheet("")
+        finally:
+            window.theme_save_timer.stop()
+            window.weather_thread_pool.waitForDone(5000)
+            window.close()
+            window.deleteLater()
+            QApplication.processEvents()
+
+if __name__ == "__main__":
+    main()
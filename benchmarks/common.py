@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import itertools
+import statistics
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import veritabani
+
+WORDS = ("bugün yarın sabah akşam hava güneşli yağmurlu ılık soğuk kar ışık deniz şehir yol iş okul arkadaş aile "
+         "kahve çay kitap film müzik yürüyüş koşu uyku rüya toplantı proje ödev sınav tatil bayram doğum günü "
+         "mutlu yorgun heyecanlı sakin endişeli güzel zor kolay uzun kısa erken geç öğle yemek kahvaltı akşamüstü "
+         "pazar çarşı ağaç çiçek kedi köpek kuş gökyüzü bulut rüzgar dağ göl orman istanbul ankara izmir").split()
+
+SYLLABLES = "ka le mi şo ru tı gö na be ça di fu ğa hı jo ke".split()
+VOCABULARY = WORDS + ["".join(parts) for parts in itertools.product(SYLLABLES, repeat=3)]
+VOCABULARY_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+
+def parse_args(parser, argv=None):
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    random.seed(args.seed)
+    return args
+
+def sentence(rng=random, min_words=20, max_words=60):
+    count = rng.randint(min_words, max_words)
+    return " ".join(rng.choices(VOCABULARY, cum_weights=VOCABULARY_WEIGHTS, k=count))
+
+@contextmanager
+def scratch_database():
+    directory = tempfile.mkdtemp(prefix="kisisel_asistan_bench_")
+    previous = veritabani.DATABASE_NAME
+    veritabani.DATABASE_NAME = os.path.join(directory, "bench.db")
+    try:
+        yield veritabani.DATABASE_NAME
+    finally:
+        veritabani.get_db().close_all()
+        veritabani.DATABASE_NAME = previous
+        shutil.rmtree(directory, ignore_errors=True)
+
+def measure(fn, repeat, *args, **kwargs):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args, **kwargs)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+@contextmanager
+def stopwatch(label):
+    started = time.perf_counter()
+    yield
+    print(f"{label:<44} {time.perf_counter() - started:10.2f} s")
+
+def report(label, samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:<44} p50 {statistics.median(ordered) * 1000:9.3f} ms   p95 {p95 * 1000:9.3f} ms   n={len(ordered)}")
+    return statistics.median(ordered)
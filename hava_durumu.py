@@ -0,0 +1,227 @@
+import time
+import threading
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+from olcumler import timed
+from veritabani import (WEATHER_UNITS, WEATHER_LANG, WeatherCache, weather_cache, forecast_store,
+                        get_weather_icon_bytes, save_weather_icon_bytes, releases_connection)
+
+requests = None
+
+def _load_requests():
+    global requests
+    if requests is None:
+        import requests as requests_module
+        requests = requests_module
+    return requests
+
+WEATHER_API_KEY_PLACEHOLDER = "YOUR_OPENWEATHERMAP_API_KEY"
+WEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather?"
+WEATHER_GROUP_URL = "http://api.openweathermap.org/data/2.5/group?"
+WEATHER_FORECAST_URL = "http://api.openweathermap.org/data/2.5/forecast?"
+WEATHER_GROUP_LIMIT = 20
+WEATHER_DASHBOARD_WORKERS = 8
+WEATHER_ICON_URL = "http://openweathermap.org/img/wn/{icon_code}@2x.png"
+WEATHER_POOL_SIZE = 8
+WEATHER_PER_HOST_LIMIT = 8
+WEATHER_MAX_RETRIES = 3
+WEATHER_BACKOFF_BASE = 0.5
+WEATHER_BACKOFF_CAP = 8.0
+WEATHER_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.suppressed = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self.calls += 1
+            else:
+                self.suppressed += 1
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+        try:
+            call["result"] = fn(*args, **kwargs)
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+        return call["result"]
+
+    def stats(self):
+        with self._lock:
+            return {"calls": self.calls, "suppressed": self.suppressed, "in_flight": len(self._calls)}
+
+class WeatherClient:
+    def __init__(self, pool_size=WEATHER_POOL_SIZE, per_host_limit=WEATHER_PER_HOST_LIMIT, max_retries=WEATHER_MAX_RETRIES,
+                 backoff_base=WEATHER_BACKOFF_BASE, backoff_cap=WEATHER_BACKOFF_CAP):
+        self.per_host_limit = per_host_limit
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.pool_size = pool_size
+        self._session = None
+        self._host_limits = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.single_flight = SingleFlight()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    _load_requests()
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, pool_block=True,
+                                          max_retries=0)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._session = session
+        return self._session
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_limits[host]
+
+    def _backoff_delay(self, attempt, retry_after=None):
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    @timed("http")
+    def get(self, url, params=None, timeout=10):
+        host_limit = self._host_limit(url)
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                with host_limit:
+                    response = self.session.get(url, params=params, timeout=timeout)
+            except requests.exceptions.ConnectionError:
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in WEATHER_RETRY_STATUSES or attempt == self.max_retries:
+                    return response
+                retry_after = response.headers.get("Retry-After")
+                response.close()
+            with self._lock:
+                self.retries += 1
+            time.sleep(self._backoff_delay(attempt, retry_after))
+
+    def fetch_current(self, city_name, api_key, units=WEATHER_UNITS, lang=WEATHER_LANG):
+        key = ("current", WeatherCache._key(city_name, units, lang), api_key)
+        return self.single_flight.do(key, self._fetch_current, city_name, api_key, units, lang)
+
+    @timed("http")
+    def _fetch_current(self, city_name, api_key, units, lang):
+        params = {"q": city_name, "appid": api_key, "units": units, "lang": lang}
+        response = self.get(WEATHER_BASE_URL, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        weather_cache.put(city_name, data, units, lang)
+        return data
+
+    def fetch_forecast(self, city_name, api_key, units=WEATHER_UNITS, lang=WEATHER_LANG):
+        key = ("forecast", WeatherCache._key(city_name, units, lang), api_key)
+        return self.single_flight.do(key, self._fetch_forecast, city_name, api_key, units, lang)
+
+    @timed("http")
+    def _fetch_forecast(self, city_name, api_key, units, lang):
+        params = {"q": city_name, "appid": api_key, "units": units, "lang": lang}
+        response = self.get(WEATHER_FORECAST_URL, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        forecast_store.put(city_name, data, units, lang)
+        return data
+
+    @timed("http")
+    def fetch_group(self, city_ids, api_key, units=WEATHER_UNITS, lang=WEATHER_LANG):
+        params = {"id": ",".join(str(city_id) for city_id in city_ids), "appid": api_key, "units": units, "lang": lang}
+        response = self.get(WEATHER_GROUP_URL, params=params, timeout=10)
+        response.raise_for_status()
+        return response.json().get("list", [])
+
+    def fetch_many(self, cities, api_key, city_ids=None, max_workers=WEATHER_DASHBOARD_WORKERS):
+        results = {}
+        known = [(city, city_ids[city]) for city in cities if city_ids and city_ids.get(city)]
+        for start in range(0, len(known), WEATHER_GROUP_LIMIT):
+            chunk = dict((city_id, city) for city, city_id in known[start:start + WEATHER_GROUP_LIMIT])
+            try:
+                for data in self.fetch_group(list(chunk), api_key):
+                    city = chunk.get(data.get("id"))
+                    if city is not None:
+                        weather_cache.put(city, data)
+                        results[city] = data
+            except (requests.exceptions.RequestException, ValueError):
+                pass
+        remaining = [city for city in cities if city not in results]
+        if remaining:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(remaining))) as executor:
+                futures = {executor.submit(releases_connection(self.fetch_current), city, api_key): city for city in remaining}
+                for future in as_completed(futures):
+                    try:
+                        results[futures[future]] = future.result()
+                    except Exception as e:
+                        results[futures[future]] = e
+        return results
+
+    def fetch_icon(self, icon_code):
+        return self.single_flight.do(("icon", icon_code), self._fetch_icon, icon_code)
+
+    @timed("http")
+    def _fetch_icon(self, icon_code):
+        icon_data = get_weather_icon_bytes(icon_code)
+        if icon_data is None:
+            response = self.get(WEATHER_ICON_URL.format(icon_code=icon_code), timeout=5)
+            response.raise_for_status()
+            icon_data = response.content
+            save_weather_icon_bytes(icon_code, icon_data)
+        return icon_data
+
+    def try_fetch_icon(self, data):
+        try:
+            return self.fetch_icon(data['weather'][0]['icon'])
+        except (requests.exceptions.RequestException, KeyError, IndexError):
+            return None
+
+    def refresh_forecast(self, city_name, api_key):
+        if forecast_store.is_fresh(city_name):
+            return True
+        try:
+            self.fetch_forecast(city_name, api_key)
+            return True
+        except (requests.exceptions.RequestException, ValueError, KeyError, IndexError):
+            return False
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+weather_client = WeatherClient()
+
+def classify_weather_error(error):
+    if requests is not None and isinstance(error, requests.exceptions.HTTPError):
+        return "http", error.response.status_code if error.response is not None else 0
+    if requests is not None and isinstance(error, requests.exceptions.RequestException):
+        return "connection", 0
+    return "unexpected", 0
@@ -1,20 +1,39 @@
 import sys
-import sqlite3
+import os
 import hashlib
 import datetime
-import requests
+import time
+import json
+import argparse
+import mmap
+import struct
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QCheckBox, QComboBox,
                              QGroupBox, QRadioButton, QDialog, QProgressBar, QSlider, QTableWidget, QTableWidgetItem, QMenuBar, QAction,
                              QInputDialog, QDial, QToolBox, QListWidget, QLabel, QPushButton, QTabWidget, QSpinBox, QDoubleSpinBox,
-                             QFormLayout, QTextEdit, QMessageBox, QCalendarWidget, QDesktopWidget, QHeaderView, QSizePolicy,
-                             QStyle, QGridLayout)
-from PyQt5.QtCore import Qt, QDate, QTimer, QSize, QFile
-from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPixmap
+                             QFormLayout, QTextEdit, QMessageBox, QCalendarWidget, QDesktopWidget, QHeaderView, QSizePolicy, QTableView,
+                             QStyle, QGridLayout, QProgressDialog, QShortcut)
+from PyQt5.QtCore import (Qt, QDate, QTimer, QSize, QThread, QEventLoop, pyqtSignal, QAbstractTableModel,
+                          QModelIndex, QObject, QRunnable, QThreadPool)
+from PyQt5.QtGui import QFont, QPalette, QColor, QIcon, QPixmap, QTextCharFormat, QPixmapCache, QKeySequence
 import traceback
 
-DATABASE_NAME = 'personal_diary_app_v2.db'
-WEATHER_API_KEY = "YOUR_OPENWEATHERMAP_API_KEY"
-WEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather?"
+from olcumler import instrumentation, timed, METRICS_JSONL_FILE, METRICS_PROMETHEUS_FILE
+from veritabani import (DIARY_PAGE_SIZE, WEATHER_CACHE_TTL, HealthMonthCache, add_diary_entry, add_saved_city, add_user,
+                        check_user, delete_diary_entry, forecast_store, get_db, get_diary_entries_page, get_diary_entry_by_id,
+                        get_diary_entry_summary, get_diary_version, get_saved_cities, get_weather_icon_bytes,
+                        has_pending_migrations, init_db, load_health_series, load_user_preferences, remove_saved_city,
+                        releases_connection, run_migrations, search_diary_entries, set_saved_city_ids, summarize_health,
+                        update_health_log, weather_cache)
+from hava_durumu import WEATHER_API_KEY_PLACEHOLDER, classify_weather_error, weather_client
+from komut_satiri import CLI_COMMANDS, main as cli_main
+
+WEATHER_OBSERVATION_INTERVAL = 600
+WEATHER_REFRESH_MIN_INTERVAL = 60
+WEATHER_REFRESH_MAX_INTERVAL = 3600
+WEATHER_ERROR_BACKOFF_BASE = 60
+WEATHER_PREFETCH_LEAD = 120
+WEATHER_USAGE_HISTORY = 30
+WEATHER_USAGE_WINDOW = 15
 
 ICON_PATHS = {
     "app_icon": "icons/app_icon.png",
@@ -47,190 +66,639 @@ ICON_PATHS = {
     "api_key_icon": "icons/api_key_icon.png"
 }
 
-def get_icon(icon_key, fallback_style_enum=None):
-    icon_path = ICON_PATHS.get(icon_key)
-    if icon_path and QFile.exists(icon_path):
-        return QIcon(icon_path)
-    elif fallback_style_enum and QApplication.instance():
+ICON_BUNDLE_FILE = "icons.pack"
+ICON_BUNDLE_MAGIC = b"KAICONS1"
+ICON_STYLE_FALLBACKS = {
+    "exit": QStyle.SP_DialogCancelButton,
+    "save": QStyle.SP_DialogSaveButton,
+    "delete": QStyle.SP_TrashIcon,
+    "view": QStyle.SP_FileIcon,
+}
+
+def pack_icons(paths=ICON_PATHS, output=ICON_BUNDLE_FILE):
+    index, blobs, offset = {}, [], 0
+    for icon_key, icon_path in paths.items():
         try:
-            return QApplication.instance().style().standardIcon(fallback_style_enum)
-        except Exception:
-            pass
-    if icon_key == "exit" and QApplication.instance():
-        return QApplication.instance().style().standardIcon(QStyle.SP_DialogCancelButton)
-    if icon_key == "save" and QApplication.instance():
-        return QApplication.instance().style().standardIcon(QStyle.SP_DialogSaveButton)
-    if icon_key == "delete" and QApplication.instance():
-        return QApplication.instance().style().standardIcon(QStyle.SP_TrashIcon)
-    if icon_key == "view" and QApplication.instance():
-        return QApplication.instance().style().standardIcon(QStyle.SP_FileIcon)
-    return QIcon()
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def init_db():
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        username TEXT UNIQUE NOT NULL,
-        password_hash TEXT NOT NULL,
-        name TEXT,
-        surname TEXT
-    )
-    ''')
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS diary_entries (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        entry_date TEXT NOT NULL,
-        title TEXT,
-        content TEXT NOT NULL,
-        mood TEXT,
-        is_important INTEGER DEFAULT 0,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS health_data (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        log_date TEXT NOT NULL,
-        water_ml INTEGER DEFAULT 0,
-        exercise_km REAL DEFAULT 0.0,
-        sleep_hours REAL DEFAULT 0.0,
-        UNIQUE(user_id, log_date),
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS user_preferences (
-        user_id INTEGER PRIMARY KEY,
-        theme_color TEXT,
-        city TEXT,
-        api_key TEXT,
-        FOREIGN KEY (user_id) REFERENCES users (id)
-    )
-    ''')
-    try:
-        cursor.execute("SELECT api_key FROM user_preferences LIMIT 1")
-    except sqlite3.OperationalError:
-        cursor.execute("ALTER TABLE user_preferences ADD COLUMN api_key TEXT")
+            with open(icon_path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            continue
+        index[icon_key] = [offset, len(blob)]
+        blobs.append(blob)
+        offset += len(blob)
+    header = json.dumps(index).encode("utf-8")
+    with open(output, "wb") as f:
+        f.write(ICON_BUNDLE_MAGIC + struct.pack("<I", len(header)) + header)
+        for blob in blobs:
+            f.write(blob)
+    return len(index)
+
+class IconBundle:
+    def __init__(self, path=ICON_BUNDLE_FILE):
+        self.index = {}
+        self._data = None
+        try:
+            with open(path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return
+        header_start = len(ICON_BUNDLE_MAGIC) + 4
+        try:
+            if self._data[:len(ICON_BUNDLE_MAGIC)] != ICON_BUNDLE_MAGIC:
+                raise ValueError("simge paketi imzası geçersiz")
+            header_length = struct.unpack("<I", self._data[len(ICON_BUNDLE_MAGIC):header_start])[0]
+            index = json.loads(self._data[header_start:header_start + header_length].decode("utf-8"))
+            base = header_start + header_length
+            if not isinstance(index, dict) or not all(
+                    isinstance(entry, list) and len(entry) == 2 and all(isinstance(value, int) for value in entry)
+                    and entry[0] >= 0 and entry[1] >= 0 and base + entry[0] + entry[1] <= len(self._data)
+                    for entry in index.values()):
+                raise ValueError("simge paketi dizini bozuk")
+        except (struct.error, ValueError):
+            self._data.close()
+            self._data = None
+            return
+        self.index = index
+        self._base = base
+
+    def data(self, icon_key):
+        entry = self.index.get(icon_key)
+        if entry is None:
+            return None
+        offset, length = entry
+        return self._data[self._base + offset:self._base + offset + length]
+
+class IconRegistry:
+    def __init__(self, paths=ICON_PATHS, bundle_path=ICON_BUNDLE_FILE):
+        self.paths = paths
+        self.bundle_path = bundle_path
+        self._bundle = None
+        self._files = None
+        self._icons = {}
+        self._pixmaps = {}
+
+    def _load(self):
+        self._bundle = IconBundle(self.bundle_path)
+        self._files = set()
+        for directory in {os.path.dirname(path) or "." for path in self.paths.values()}:
+            try:
+                with os.scandir(directory) as entries:
+                    self._files.update(os.path.join(directory, entry.name) for entry in entries if entry.is_file())
+            except OSError:
+                pass
+
+    def pixmap(self, icon_key):
+        if icon_key in self._pixmaps:
+            return self._pixmaps[icon_key]
+        if self._bundle is None:
+            self._load()
+        pixmap = QPixmap()
+        data = self._bundle.data(icon_key)
+        if data is None or not pixmap.loadFromData(data):
+            icon_path = self.paths.get(icon_key)
+            pixmap = QPixmap(icon_path) if icon_path in self._files else QPixmap()
+        self._pixmaps[icon_key] = pixmap
+        return pixmap
+
+    def icon(self, icon_key, fallback_style_enum=None):
+        cache_key = (icon_key, fallback_style_enum)
+        icon = self._icons.get(cache_key)
+        if icon is not None:
+            return icon
+        app = QApplication.instance()
+        pixmap = self.pixmap(icon_key)
+        if not pixmap.isNull():
+            icon = QIcon(pixmap)
+        elif app is None:
+            return QIcon()
+        elif fallback_style_enum or icon_key in ICON_STYLE_FALLBACKS:
+            icon = app.style().standardIcon(fallback_style_enum or ICON_STYLE_FALLBACKS[icon_key])
+        else:
+            icon = QIcon()
+        self._icons[cache_key] = icon
+        return icon
+
+icon_registry = IconRegistry()
+
+def get_icon(icon_key, fallback_style_enum=None):
+    return icon_registry.icon(icon_key, fallback_style_enum)
+
+
+THEME_PALETTES = {
+    "Mavi": ("#E0F2F7", "#B3E5FC", "#81D4FA", "#29B6F6", "#FFFFFF", "#222222"),
+    "Yeşil": ("#E8F5E9", "#C8E6C9", "#A5D6A7", "#66BB6A", "#FFFFFF", "#1B5E20"),
+    "Sarı": ("#FFFDE7", "#FFF9C4", "#FFF59D", "#FFEE58", "#424242", "#795548"),
+    "Kırmızı": ("#FFEBEE", "#FFCDD2", "#EF9A9A", "#EF5350", "#FFFFFF", "#B71C1C"),
+    "Mor": ("#F3E5F5", "#E1BEE7", "#CE93D8", "#AB47BC", "#FFFFFF", "#4A148C"),
+    "Turuncu": ("#FFF3E0", "#FFE0B2", "#FFCC80", "#FFA726", "#FFFFFF", "#E65100"),
+    "Koyu Gri": ("#ECEFF1", "#CFD8DC", "#B0BEC5", "#78909C", "#FFFFFF", "#263238"),
+    "Pembe": ("#FCE4EC", "#F8BBD0", "#F48FB1", "#F06292", "#FFFFFF", "#880E4F"),
+    "Doğa Yeşili": ("#D1E8D1", "#A3D1A3", "#7CC07C", "#5EAE5E", "#FFFFFF", "#104510"),
+    "Gökyüzü Mavisi": ("#D6EEF7", "#AEDBF0", "#8AC9E9", "#6AB7E2", "#FFFFFF", "#1A3A4A")
+}
+THEME_STYLESHEET_VERSION = 1
 
-    conn.commit()
-    conn.close()
+def is_light_color(hex_color):
+    color = QColor(hex_color)
+    return color.lightnessF() > 0.6
 
-def add_user(username, password, name, surname):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
+def adjust_color(hex_color, amount):
     try:
-        cursor.execute("INSERT INTO users (username, password_hash, name, surname) VALUES (?, ?, ?, ?)",
-                       (username, hash_password(password), name, surname))
-        user_id = cursor.lastrowid
-        if user_id:
-            cursor.execute("INSERT OR IGNORE INTO user_preferences (user_id, theme_color, city, api_key) VALUES (?, ?, ?, ?)",
-                           (user_id, "Mavi", "Istanbul", None))
-        conn.commit()
-        return True
-    except sqlite3.IntegrityError:
-        return False
-    finally:
-        conn.close()
-
-def check_user(username, password):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, password_hash, name, surname FROM users WHERE username = ?", (username,))
-    user_record = cursor.fetchone()
-    conn.close()
-    if user_record and user_record[1] == hash_password(password):
-        user_name = user_record[2] if user_record[2] is not None else ""
-        user_surname = user_record[3] if user_record[3] is not None else ""
-        return {"id": user_record[0], "name": user_name, "surname": user_surname, "username": username}
-    return None
-
-def save_user_preference(user_id, key, value):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR IGNORE INTO user_preferences (user_id, theme_color, city, api_key) VALUES (?, ?, ?, ?)",
-                   (user_id, "Mavi", "Istanbul", None))
-
-    valid_keys = ["theme_color", "city", "api_key"]
-    if key in valid_keys:
-        cursor.execute(f"UPDATE user_preferences SET {key} = ? WHERE user_id = ?", (value, user_id))
-    else:
-        conn.close()
-        return
-    conn.commit()
-    conn.close()
-
-def get_user_preference(user_id, key):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    valid_keys = ["theme_color", "city", "api_key"]
-    if key not in valid_keys:
-        conn.close()
+        color = QColor(hex_color)
+        h, s, l_val, a = color.getHslF()
+        
+        l_val = max(0.0, min(1.0, l_val + amount / 255.0))
+        
+        return QColor.fromHslF(h, s, l_val, a).name()
+    except Exception:
+        return hex_color
+
+def render_theme_stylesheet(palette):
+    main_bg, widget_bg, tab_bg, accent_color, text_color_on_accent, main_text_color = palette
+    return f"""
+            QMainWindow, QDialog {{ background-color: {main_bg}; font-size: 10pt; color: {main_text_color}; }}
+            QTabWidget::pane {{ border: 1px solid {adjust_color(accent_color, -30)}; background-color: {widget_bg}; border-radius: 0 0 6px 6px;}}
+            QTabBar::tab {{
+                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {adjust_color(tab_bg, 20)}, stop:1 {tab_bg});
+                border: 1px solid {adjust_color(accent_color, -30)};
+                border-bottom: none; /* Seçili olmayan tabın alt kenarını kaldır */
+                border-top-left-radius: 6px;
+                border-top-right-radius: 6px;
+                min-width: 100px; padding: 8px 15px; margin-right: 2px; color: {main_text_color}; font-weight: bold;
+            }}
+            QTabBar::tab:selected {{ background: {accent_color}; color: {text_color_on_accent}; border-color: {accent_color}; }}
+            QTabBar::tab:hover {{ background: {adjust_color(accent_color, 15)}; color: {text_color_on_accent if is_light_color(accent_color) else main_text_color };}}
+            QWidget {{ background-color: transparent; color: {main_text_color}; }}
+            QTabWidget QWidget {{ background-color: {widget_bg}; }}
+            QLabel, QCheckBox, QRadioButton {{ font-size: 10pt; background-color: transparent; color: {main_text_color}; }}
+            QLineEdit, QTextEdit, QSpinBox, QDoubleSpinBox, QComboBox {{
+                padding: 7px; border: 1px solid {adjust_color(accent_color, -50)}; border-radius: 5px;
+                background-color: #FFFFFF; font-size: 10pt; color: #333333;
+            }}
+            QComboBox QAbstractItemView {{ background-color: #FFFFFF; color: #333333; selection-background-color: {accent_color}; selection-color: {text_color_on_accent}; }}
+            QPushButton {{
+                background-color: {accent_color}; color: {text_color_on_accent}; padding: 8px 15px;
+                font-size: 10pt; border: 1px solid {adjust_color(accent_color, -20)}; border-radius: 5px; font-weight: bold;
+            }}
+            QPushButton:hover {{ background-color: {adjust_color(accent_color, -20)}; border: 1px solid {adjust_color(accent_color, -40)};}}
+            QPushButton:pressed {{ background-color: {adjust_color(accent_color, -40)}; }}
+            QPushButton:disabled {{ background-color: {adjust_color(accent_color, 50)}; color: {adjust_color(text_color_on_accent, 50)}; border-color: {adjust_color(accent_color, 30)};}}
+            QGroupBox {{
+                font-weight: bold; border: 1px solid {accent_color}; border-radius: 6px;
+                margin-top: 1em; padding: 1em 0.5em 0.5em 0.5em; background-color: {adjust_color(widget_bg, 5)};
+            }}
+            QGroupBox::title {{ subcontrol-origin: margin; subcontrol-position: top left; padding: 0 7px; left: 10px; color: {accent_color}; background-color: {widget_bg}; border-radius: 3px; }}
+            QTableView {{ gridline-color: {adjust_color(accent_color, -40)}; background-color: #FFFFFF; color: #333333; alternate-background-color: {adjust_color(widget_bg, 10)};}}
+            QHeaderView::section {{ background-color: {tab_bg}; padding: 5px; border: 1px solid {adjust_color(accent_color, -30)}; font-size: 10pt; font-weight: bold; color: {main_text_color};}}
+            QProgressBar {{ border: 1px solid {accent_color}; border-radius: 5px; text-align: center; background-color: #FFFFFF; color: {main_text_color};}}
+            QProgressBar::chunk {{ background-color: {accent_color}; border-radius: 4px;}}
+            QSlider::groove:horizontal {{ border: 1px solid {adjust_color(accent_color, -50)}; background: #FFFFFF; height: 8px; border-radius: 4px; }}
+            QSlider::handle:horizontal {{ background: {accent_color}; border: 1px solid {accent_color}; width: 16px; margin: -4px 0; border-radius: 8px;}}
+            QListWidget {{ background-color: #FFFFFF; border: 1px solid {adjust_color(accent_color, -30)}; color: #333333; }}
+            QListWidget::item:selected {{ background-color: {accent_color}; color: {text_color_on_accent}; }}
+            QMenuBar {{ background-color: {main_bg}; color: {main_text_color}; border-bottom: 1px solid {adjust_color(accent_color, -30)};}}
+            QMenuBar::item {{ background: transparent; padding: 5px 10px; }}
+            QMenuBar::item:selected {{ background: {accent_color}; color: {text_color_on_accent}; }}
+            QMenu {{ background-color: {widget_bg}; border: 1px solid {adjust_color(accent_color, -20)}; color: {main_text_color}; }}
+            QMenu::item:selected {{ background-color: {accent_color}; color: {text_color_on_accent}; }}
+            QCalendarWidget QWidget {{ alternate-background-color: {accent_color}; selection-background-color: {adjust_color(accent_color, -30)}; }}
+            QCalendarWidget QToolButton {{ color: {main_text_color}; background-color: {tab_bg}; border: none; padding: 5px; }}
+            QCalendarWidget QToolButton:hover {{ background-color: {accent_color}; color: {text_color_on_accent}; }}
+            QCalendarWidget QMenu {{ background-color: {widget_bg}; }}
+            QCalendarWidget QSpinBox {{ background-color: white; color: black; }}
+            QCalendarWidget #qt_calendar_navigationbar {{ background-color: {tab_bg}; }}
+            QToolBox::tab {{ background: {tab_bg}; border-radius: 4px; padding: 8px; color: {main_text_color}; font-weight:bold; border: 1px solid {adjust_color(accent_color, -30)}; }}
+            QToolBox::tab:selected {{ background: {accent_color}; color: {text_color_on_accent}; border: 1px solid {accent_color};}}
+            QToolBox QWidget {{ background-color: {adjust_color(widget_bg, 5)}; }}
+"""
+
+def _theme_cache_key(palette):
+    return hashlib.sha1(json.dumps([THEME_STYLESHEET_VERSION, palette]).encode()).hexdigest()
+
+class ThemeStylesheetCache:
+    def __init__(self, palettes=THEME_PALETTES):
+        self.palettes = palettes
+        self._stylesheets = {}
+        self._stored = None
+
+    @timed("db")
+    def _load_stored(self):
+        self._stored = dict(get_db().execute("SELECT cache_key, qss FROM theme_stylesheets").fetchall())
+
+    def get(self, name):
+        stylesheet = self._stylesheets.get(name)
+        if stylesheet is not None:
+            return stylesheet
+        if self._stored is None:
+            self._load_stored()
+        palette = self.palettes.get(name, self.palettes["Mavi"])
+        cache_key = _theme_cache_key(palette)
+        stylesheet = self._stored.get(cache_key)
+        if stylesheet is None:
+            stylesheet = render_theme_stylesheet(palette)
+            with get_db().transaction() as cursor:
+                cursor.execute("INSERT OR REPLACE INTO theme_stylesheets (cache_key, qss) VALUES (?, ?)", (cache_key, stylesheet))
+            self._stored[cache_key] = stylesheet
+        self._stylesheets[name] = stylesheet
+        return stylesheet
+
+    def precompile(self):
+        for name in self.palettes:
+            self.get(name)
+
+theme_stylesheets = ThemeStylesheetCache()
+
+class DiaryTableModel(QAbstractTableModel):
+    HEADERS = ["ID", "Tarih", "Başlık", "Ruh Hali", "Önemli", "Önizleme"]
+
+    def __init__(self, user_id, page_size=DIARY_PAGE_SIZE, parent=None):
+        super().__init__(parent)
+        self.user_id = user_id
+        self.page_size = page_size
+        self.search_query = ""
+        self.loaded_version = None
+        self._rows = []
+        self._exhausted = False
+        self._important_icon = get_icon("important_star")
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
         return None
-    try:
-        cursor.execute(f"SELECT {key} FROM user_preferences WHERE user_id = ?", (user_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
-    except sqlite3.OperationalError as e:
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        entry_data = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == 0:
+                return str(entry_data[0])
+            if column == 1:
+                try:
+                    return datetime.datetime.strptime(entry_data[1], "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
+                except ValueError:
+                    return entry_data[1]
+            if column in (2, 3):
+                return entry_data[column] if entry_data[column] else ""
+            if column == 4:
+                return " Evet" if entry_data[4] else "Hayır"
+            preview_text = entry_data[5] if entry_data[5] else ""
+            if len(preview_text) == 50:
+                preview_text += "..."
+            return preview_text
+        if role == Qt.DecorationRole and column == 4 and entry_data[4]:
+            return self._important_icon
+        if role == Qt.TextAlignmentRole and column == 4:
+            return Qt.AlignCenter
         return None
-    finally:
-        conn.close()
-
-def add_diary_entry(user_id, title, content, mood, is_important):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    entry_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    cursor.execute("INSERT INTO diary_entries (user_id, entry_date, title, content, mood, is_important) VALUES (?, ?, ?, ?, ?, ?)",
-                   (user_id, entry_date, title, content, mood, 1 if is_important else 0))
-    conn.commit()
-    conn.close()
-
-def get_diary_entries(user_id):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT id, entry_date, title, mood, is_important, SUBSTR(content, 1, 50) FROM diary_entries WHERE user_id = ? ORDER BY entry_date DESC", (user_id,))
-    entries = cursor.fetchall()
-    conn.close()
-    return entries
-
-def get_diary_entry_by_id(entry_id):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT title, content, mood, is_important FROM diary_entries WHERE id = ?", (entry_id,))
-    entry = cursor.fetchone()
-    conn.close()
-    return entry
-
-def delete_diary_entry(entry_id):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM diary_entries WHERE id = ?", (entry_id,))
-    conn.commit()
-    conn.close()
-
-def update_health_log(user_id, date_str, water_ml, exercise_km, sleep_hours):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR REPLACE INTO health_data (user_id, log_date, water_ml, exercise_km, sleep_hours) VALUES (?, ?, ?, ?, ?)",
-                   (user_id, date_str, water_ml, exercise_km, sleep_hours))
-    conn.commit()
-    conn.close()
-
-def get_health_log(user_id, date_str):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT water_ml, exercise_km, sleep_hours FROM health_data WHERE user_id = ? AND log_date = ?", (user_id, date_str))
-    log = cursor.fetchone()
-    conn.close()
-    return log if log else (0, 0.0, 0.0)
-
-init_db()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    @timed("ui")
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        if self.search_query:
+            page = search_diary_entries(self.user_id, self.search_query, self.page_size, len(self._rows), ("«", "»"))
+        else:
+            after = (self._rows[-1][1], self._rows[-1][0]) if self._rows else None
+            page = get_diary_entries_page(self.user_id, self.page_size, after)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self._rows), len(self._rows) + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+
+    @timed("ui")
+    def reload(self):
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self.loaded_version = get_diary_version(self.user_id)
+        self.endResetModel()
+        self.fetchMore()
+
+    @timed("ui")
+    def refresh_if_changed(self):
+        if self.loaded_version == get_diary_version(self.user_id):
+            return False
+        self.reload()
+        return True
+
+    def _accept_local_change(self):
+        current_version = get_diary_version(self.user_id)
+        if self.loaded_version is not None and current_version == self.loaded_version + 1:
+            self.loaded_version = current_version
+        else:
+            self.loaded_version = None
+
+    def insert_entry(self, entry_id):
+        if self.loaded_version is None:
+            return
+        if self.search_query:
+            self.loaded_version = None
+            return
+        entry_data = get_diary_entry_summary(entry_id)
+        if entry_data is None:
+            return
+        self._accept_local_change()
+        key = (entry_data[1], entry_data[0])
+        position = 0
+        while position < len(self._rows) and (self._rows[position][1], self._rows[position][0]) > key:
+            position += 1
+        if position == len(self._rows) and not self._exhausted:
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, entry_data)
+        self.endInsertRows()
+
+    def remove_entry(self, entry_id):
+        if self.loaded_version is None:
+            return
+        self._accept_local_change()
+        for row, entry_data in enumerate(self._rows):
+            if entry_data[0] == entry_id:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                return
+
+    def set_search_query(self, query):
+        query = query.strip()
+        if query != self.search_query:
+            self.search_query = query
+            self.reload()
+
+    def entry_id(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+
+class WeatherFetchSignals(QObject):
+    finished = pyqtSignal(int, object, object)
+    failed = pyqtSignal(int, str, str, int, str)
+
+class WeatherFetchTask(QRunnable):
+    def __init__(self, request_id, city_name, api_key):
+        super().__init__()
+        self.request_id = request_id
+        self.city_name = city_name
+        self.api_key = api_key
+        self.cancelled = False
+        self.signals = WeatherFetchSignals()
+
+    @releases_connection
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            data = weather_client.fetch_current(self.city_name, self.api_key)
+            if self.cancelled:
+                return
+            icon_data = weather_client.try_fetch_icon(data)
+            weather_client.refresh_forecast(self.city_name, self.api_key)
+            if not self.cancelled:
+                self.signals.finished.emit(self.request_id, data, icon_data)
+        except Exception as e:
+            if not self.cancelled:
+                error_kind, status_code = classify_weather_error(e)
+                self.signals.failed.emit(self.request_id, self.city_name, error_kind, status_code, str(e))
+
+class WeatherDashboardTask(QRunnable):
+    def __init__(self, request_id, user_id, cities, city_ids, api_key):
+        super().__init__()
+        self.request_id = request_id
+        self.user_id = user_id
+        self.cities = cities
+        self.city_ids = city_ids
+        self.api_key = api_key
+        self.signals = WeatherFetchSignals()
+
+    @releases_connection
+    def run(self):
+        results = weather_client.fetch_many(self.cities, self.api_key, self.city_ids)
+        new_ids = {city: data["id"] for city, data in results.items()
+                   if isinstance(data, dict) and data.get("id") and self.city_ids.get(city) != data["id"]}
+        if new_ids:
+            set_saved_city_ids(self.user_id, new_ids)
+        self.signals.finished.emit(self.request_id, results, None)
+
+class WeatherRefreshScheduler(QObject):
+    due = pyqtSignal(bool)
+
+    def __init__(self, preferences, parent=None):
+        super().__init__(parent)
+        self.preferences = preferences
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+        self.paused = False
+        self.tab_visible = False
+        self.errors = 0
+        self.fetched_at = None
+        self.observed_at = None
+        try:
+            self.open_minutes = json.loads(preferences.get("weather_open_minutes", "[]"))
+        except ValueError:
+            self.open_minutes = []
+
+    def pause(self):
+        self.paused = True
+        self.timer.stop()
+
+    def resume(self):
+        if self.paused:
+            self.paused = False
+            self.reschedule()
+
+    def set_tab_visible(self, visible):
+        if visible and not self.tab_visible:
+            now = datetime.datetime.now()
+            self.open_minutes = (self.open_minutes + [now.hour * 60 + now.minute])[-WEATHER_USAGE_HISTORY:]
+            self.preferences.weather_open_minutes = json.dumps(self.open_minutes)
+        self.tab_visible = visible
+        self.reschedule()
+
+    def note_result(self, data, fetched_at):
+        self.errors = 0
+        self.fetched_at = fetched_at
+        self.observed_at = data.get("dt") if isinstance(data, dict) else None
+        self.reschedule()
+
+    def note_error(self):
+        self.errors += 1
+        self.reschedule()
+
+    def next_prefetch_time(self, now):
+        if len(self.open_minutes) < 2:
+            return None
+        midnight = datetime.datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+        candidates = []
+        for minute in set(self.open_minutes):
+            neighbours = sum(1 for other in self.open_minutes
+                             if min(abs(other - minute), 1440 - abs(other - minute)) <= WEATHER_USAGE_WINDOW)
+            if neighbours < 2:
+                continue
+            for day in (0, 1):
+                opens_at = (midnight + datetime.timedelta(days=day, minutes=minute)).timestamp()
+                if opens_at - WEATHER_PREFETCH_LEAD <= now:
+                    continue
+                if self.fetched_at is None or self.fetched_at + WEATHER_CACHE_TTL < opens_at:
+                    candidates.append(opens_at - WEATHER_PREFETCH_LEAD)
+                break
+        return min(candidates) if candidates else None
+
+    def next_delay(self, now=None):
+        now = now or time.time()
+        if not self.tab_visible:
+            prefetch_at = self.next_prefetch_time(now)
+            return None if prefetch_at is None else prefetch_at - now
+        if self.errors:
+            return min(WEATHER_REFRESH_MAX_INTERVAL, WEATHER_ERROR_BACKOFF_BASE * 2 ** (self.errors - 1))
+        if self.fetched_at is None:
+            return None
+        next_reading = max(self.fetched_at + WEATHER_CACHE_TTL,
+                           (self.observed_at or self.fetched_at) + WEATHER_OBSERVATION_INTERVAL)
+        return min(max(next_reading - now, WEATHER_REFRESH_MIN_INTERVAL), WEATHER_REFRESH_MAX_INTERVAL)
+
+    def reschedule(self):
+        self.timer.stop()
+        if self.paused:
+            return
+        delay = self.next_delay()
+        if delay is not None:
+            self.timer.start(int(delay * 1000))
+
+    def _on_timeout(self):
+        if not self.paused:
+            self.due.emit(not self.tab_visible)
+
+class MigrationWorker(QThread):
+    progress = pyqtSignal(int, int, int)
+    failed = pyqtSignal(str)
+
+    @releases_connection
+    def run(self):
+        try:
+            run_migrations(progress_callback=self.progress.emit)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def run_online_migrations(parent=None):
+    if not has_pending_migrations():
+        return True
+    progress_dialog = QProgressDialog("Veritabanı güncelleniyor...", None, 0, 0, parent)
+    progress_dialog.setWindowTitle("Veritabanı Güncellemesi")
+    progress_dialog.setWindowIcon(get_icon("app_icon"))
+    progress_dialog.setWindowModality(Qt.ApplicationModal)
+    progress_dialog.setMinimumDuration(0)
+
+    def on_progress(number, done, total):
+        progress_dialog.setMaximum(total)
+        progress_dialog.setValue(done)
+        progress_dialog.setLabelText(f"Veritabanı güncelleniyor (adım {number})... {done}/{total}")
+
+    errors = []
+    worker = MigrationWorker()
+    worker.progress.connect(on_progress)
+    worker.failed.connect(errors.append)
+    loop = QEventLoop()
+    worker.finished.connect(loop.quit)
+    worker.start()
+    progress_dialog.show()
+    loop.exec_()
+    progress_dialog.close()
+    if errors:
+        QMessageBox.critical(parent, "Veritabanı Hatası", f"Veritabanı güncellenirken bir hata oluştu: {errors[0]}")
+        return False
+    return True
+
+class DebugPanel(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performans Ölçümleri")
+        self.resize(760, 420)
+        layout = QVBoxLayout(self)
+
+        self.enabled_checkbox = QCheckBox("Ölçümü etkinleştir", self)
+        self.enabled_checkbox.setChecked(instrumentation.enabled)
+        self.enabled_checkbox.toggled.connect(self.set_enabled)
+        layout.addWidget(self.enabled_checkbox)
+
+        self.metrics_table = QTableWidget(self)
+        self.metrics_table.setColumnCount(7)
+        self.metrics_table.setHorizontalHeaderLabels(["Ölçüm", "Tür", "Sayı", "Ort. (ms)", "p50 (ms)", "p95 (ms)", "Maks. (ms)"])
+        self.metrics_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.metrics_table)
+
+        button_layout = QHBoxLayout()
+        refresh_button = QPushButton("Yenile", self)
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+        export_button = QPushButton("Dosyaya Yaz", self)
+        export_button.clicked.connect(self.export)
+        button_layout.addWidget(export_button)
+        reset_button = QPushButton("Sıfırla", self)
+        reset_button.clicked.connect(self.reset)
+        button_layout.addWidget(reset_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(2000)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.refresh_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.refresh_timer.stop()
+        super().hideEvent(event)
+
+    def closeEvent(self, event):
+        self.refresh_timer.stop()
+        super().closeEvent(event)
+
+    def set_enabled(self, enabled):
+        instrumentation.enabled = enabled
+
+    def refresh(self):
+        histograms = instrumentation.histograms()
+        self.metrics_table.setRowCount(len(histograms))
+        for row, histogram in enumerate(histograms):
+            values = [histogram.name, histogram.category, str(histogram.count),
+                      f"{histogram.total / histogram.count * 1000:.2f}" if histogram.count else "-",
+                      f"≤{histogram.quantile(0.5) * 1000:.1f}", f"≤{histogram.quantile(0.95) * 1000:.1f}",
+                      f"{histogram.max * 1000:.2f}"]
+            for column, value in enumerate(values):
+                self.metrics_table.setItem(row, column, QTableWidgetItem(value))
+
+    def export(self):
+        try:
+            instrumentation.write_jsonl()
+            instrumentation.write_prometheus()
+        except OSError as e:
+            QMessageBox.critical(self, "Hata", f"Ölçümler yazılamadı: {e}")
+            return
+        QMessageBox.information(self, "Kaydedildi",
+                                f"Ölçümler '{METRICS_JSONL_FILE}' ve '{METRICS_PROMETHEUS_FILE}' dosyalarına yazıldı.")
+
+    def reset(self):
+        instrumentation.reset()
+        self.refresh()
 
 class LoginDialog(QDialog):
     def __init__(self, parent=None):
@@ -395,115 +863,90 @@ class App(QMainWindow):
         self.user_name_str = str(self.user_data.get("name", ""))
         self.user_surname_str = str(self.user_data.get("surname", ""))
 
-        global WEATHER_API_KEY
-        saved_api_key = get_user_preference(self.user_id, "api_key")
-        if saved_api_key:
-            WEATHER_API_KEY = saved_api_key
-        
+        self.preferences = load_user_preferences(self.user_id)
+        self.preferences.subscribe(self._on_preference_changed)
+
         self.setWindowIcon(get_icon("app_icon"))
         self.setWindowTitle(f"Kişisel Asistanım - Hoş Geldin {self.user_name_str}!")
         self.setGeometry(0, 0, 1200, 850)
         self.center_window()
 
-        self.current_theme_color_name = get_user_preference(self.user_id, "theme_color") or "Mavi"
-        self.apply_theme_color(self.current_theme_color_name)
+        self.current_theme_color_name = None
+        self.theme_save_timer = QTimer(self)
+        self.theme_save_timer.setSingleShot(True)
+        self.theme_save_timer.setInterval(500)
+        self.theme_save_timer.timeout.connect(self._save_theme_color)
+        self.apply_theme_color(self.preferences.get("theme_color", "Mavi"))
+        QTimer.singleShot(0, theme_stylesheets.precompile)
+
+        self.weather_thread_pool = QThreadPool(self)
+        self.weather_thread_pool.setMaxThreadCount(2)
+        self._weather_request_id = 0
+        self._weather_task = None
+        self._weather_revalidating = False
+        self._weather_city = None
 
         self._create_menu_bar()
         self.init_ui()
 
-        self.weather_timer = QTimer(self)
-        self.weather_timer.timeout.connect(self.auto_fetch_weather)
-        self.weather_timer.start(1800000)
+        self.weather_scheduler = WeatherRefreshScheduler(self.preferences, self)
+        self.weather_scheduler.due.connect(self._on_weather_refresh_due)
+        self.weather_scheduler.reschedule()
+
+        self.debug_panel = None
+        self.debug_shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        self.debug_shortcut.activated.connect(self.show_debug_panel)
+
+    def show_debug_panel(self):
+        if self.debug_panel is None:
+            self.debug_panel = DebugPanel(self)
+        self.debug_panel.show()
+        self.debug_panel.raise_()
+
+    def closeEvent(self, event):
+        if self.theme_save_timer.isActive():
+            self._save_theme_color()
+        if instrumentation.enabled and instrumentation.histograms():
+            try:
+                instrumentation.write_jsonl()
+                instrumentation.write_prometheus()
+            except OSError:
+                pass
+        super().closeEvent(event)
+
+    def changeEvent(self, event):
+        if event.type() == event.WindowStateChange and hasattr(self, 'weather_scheduler'):
+            if self.isMinimized():
+                self.weather_scheduler.pause()
+            else:
+                self.weather_scheduler.resume()
+        super().changeEvent(event)
+
+    def showEvent(self, event):
+        if hasattr(self, 'weather_scheduler') and not self.isMinimized():
+            self.weather_scheduler.resume()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        if hasattr(self, 'weather_scheduler'):
+            self.weather_scheduler.pause()
+        super().hideEvent(event)
 
 
+    @timed("ui")
     def apply_theme_color(self, color_name_key):
+        if color_name_key not in THEME_PALETTES:
+            color_name_key = "Mavi"
+        if color_name_key != self.current_theme_color_name:
+            self.setStyleSheet(theme_stylesheets.get(color_name_key))
         self.current_theme_color_name = color_name_key
-        self.color_map_themes = {
-            "Mavi": ("#E0F2F7", "#B3E5FC", "#81D4FA", "#29B6F6", "#FFFFFF", "#222222"),
-            "Yeşil": ("#E8F5E9", "#C8E6C9", "#A5D6A7", "#66BB6A", "#FFFFFF", "#1B5E20"),
-            "Sarı": ("#FFFDE7", "#FFF9C4", "#FFF59D", "#FFEE58", "#424242", "#795548"),
-            "Kırmızı": ("#FFEBEE", "#FFCDD2", "#EF9A9A", "#EF5350", "#FFFFFF", "#B71C1C"),
-            "Mor": ("#F3E5F5", "#E1BEE7", "#CE93D8", "#AB47BC", "#FFFFFF", "#4A148C"),
-            "Turuncu": ("#FFF3E0", "#FFE0B2", "#FFCC80", "#FFA726", "#FFFFFF", "#E65100"),
-            "Koyu Gri": ("#ECEFF1", "#CFD8DC", "#B0BEC5", "#78909C", "#FFFFFF", "#263238"),
-            "Pembe": ("#FCE4EC", "#F8BBD0", "#F48FB1", "#F06292", "#FFFFFF", "#880E4F"),
-            "Doğa Yeşili": ("#D1E8D1", "#A3D1A3", "#7CC07C", "#5EAE5E", "#FFFFFF", "#104510"),
-            "Gökyüzü Mavisi": ("#D6EEF7", "#AEDBF0", "#8AC9E9", "#6AB7E2", "#FFFFFF", "#1A3A4A")
-        }
-        current_palette = self.color_map_themes.get(color_name_key, self.color_map_themes["Mavi"])
-        main_bg, widget_bg, tab_bg, accent_color, text_color_on_accent, main_text_color = current_palette
-        self.setStyleSheet(f"""
-            QMainWindow, QDialog {{ background-color: {main_bg}; font-size: 10pt; color: {main_text_color}; }}
-            QTabWidget::pane {{ border: 1px solid {self.adjust_color(accent_color, -30)}; background-color: {widget_bg}; border-radius: 0 0 6px 6px;}}
-            QTabBar::tab {{
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 {self.adjust_color(tab_bg, 20)}, stop:1 {tab_bg});
-                border: 1px solid {self.adjust_color(accent_color, -30)};
-                border-bottom: none; /* Seçili olmayan tabın alt kenarını kaldır */
-                border-top-left-radius: 6px;
-                border-top-right-radius: 6px;
-                min-width: 100px; padding: 8px 15px; margin-right: 2px; color: {main_text_color}; font-weight: bold;
-            }}
-            QTabBar::tab:selected {{ background: {accent_color}; color: {text_color_on_accent}; border-color: {accent_color}; }}
-            QTabBar::tab:hover {{ background: {self.adjust_color(accent_color, 15)}; color: {text_color_on_accent if self.is_light_color(accent_color) else main_text_color };}}
-            QWidget {{ background-color: transparent; color: {main_text_color}; }}
-            QTabWidget QWidget {{ background-color: {widget_bg}; }}
-            QLabel, QCheckBox, QRadioButton {{ font-size: 10pt; background-color: transparent; color: {main_text_color}; }}
-            QLineEdit, QTextEdit, QSpinBox, QDoubleSpinBox, QComboBox {{
-                padding: 7px; border: 1px solid {self.adjust_color(accent_color, -50)}; border-radius: 5px;
-                background-color: #FFFFFF; font-size: 10pt; color: #333333;
-            }}
-            QComboBox QAbstractItemView {{ background-color: #FFFFFF; color: #333333; selection-background-color: {accent_color}; selection-color: {text_color_on_accent}; }}
-            QPushButton {{
-                background-color: {accent_color}; color: {text_color_on_accent}; padding: 8px 15px;
-                font-size: 10pt; border: 1px solid {self.adjust_color(accent_color, -20)}; border-radius: 5px; font-weight: bold;
-            }}
-            QPushButton:hover {{ background-color: {self.adjust_color(accent_color, -20)}; border: 1px solid {self.adjust_color(accent_color, -40)};}}
-            QPushButton:pressed {{ background-color: {self.adjust_color(accent_color, -40)}; }}
-            QPushButton:disabled {{ background-color: {self.adjust_color(accent_color, 50)}; color: {self.adjust_color(text_color_on_accent, 50)}; border-color: {self.adjust_color(accent_color, 30)};}}
-            QGroupBox {{
-                font-weight: bold; border: 1px solid {accent_color}; border-radius: 6px;
-                margin-top: 1em; padding: 1em 0.5em 0.5em 0.5em; background-color: {self.adjust_color(widget_bg, 5)};
-            }}
-            QGroupBox::title {{ subcontrol-origin: margin; subcontrol-position: top left; padding: 0 7px; left: 10px; color: {accent_color}; background-color: {widget_bg}; border-radius: 3px; }}
-            QTableWidget {{ gridline-color: {self.adjust_color(accent_color, -40)}; background-color: #FFFFFF; color: #333333; alternate-background-color: {self.adjust_color(widget_bg, 10)};}}
-            QHeaderView::section {{ background-color: {tab_bg}; padding: 5px; border: 1px solid {self.adjust_color(accent_color, -30)}; font-size: 10pt; font-weight: bold; color: {main_text_color};}}
-            QProgressBar {{ border: 1px solid {accent_color}; border-radius: 5px; text-align: center; background-color: #FFFFFF; color: {main_text_color};}}
-            QProgressBar::chunk {{ background-color: {accent_color}; border-radius: 4px;}}
-            QSlider::groove:horizontal {{ border: 1px solid {self.adjust_color(accent_color, -50)}; background: #FFFFFF; height: 8px; border-radius: 4px; }}
-            QSlider::handle:horizontal {{ background: {accent_color}; border: 1px solid {accent_color}; width: 16px; margin: -4px 0; border-radius: 8px;}}
-            QListWidget {{ background-color: #FFFFFF; border: 1px solid {self.adjust_color(accent_color, -30)}; color: #333333; }}
-            QListWidget::item:selected {{ background-color: {accent_color}; color: {text_color_on_accent}; }}
-            QMenuBar {{ background-color: {main_bg}; color: {main_text_color}; border-bottom: 1px solid {self.adjust_color(accent_color, -30)};}}
-            QMenuBar::item {{ background: transparent; padding: 5px 10px; }}
-            QMenuBar::item:selected {{ background: {accent_color}; color: {text_color_on_accent}; }}
-            QMenu {{ background-color: {widget_bg}; border: 1px solid {self.adjust_color(accent_color, -20)}; color: {main_text_color}; }}
-            QMenu::item:selected {{ background-color: {accent_color}; color: {text_color_on_accent}; }}
-            QCalendarWidget QWidget {{ alternate-background-color: {accent_color}; selection-background-color: {self.adjust_color(accent_color, -30)}; }}
-            QCalendarWidget QToolButton {{ color: {main_text_color}; background-color: {tab_bg}; border: none; padding: 5px; }}
-            QCalendarWidget QToolButton:hover {{ background-color: {accent_color}; color: {text_color_on_accent}; }}
-            QCalendarWidget QMenu {{ background-color: {widget_bg}; }}
-            QCalendarWidget QSpinBox {{ background-color: white; color: black; }}
-            QCalendarWidget #qt_calendar_navigationbar {{ background-color: {tab_bg}; }}
-            QToolBox::tab {{ background: {tab_bg}; border-radius: 4px; padding: 8px; color: {main_text_color}; font-weight:bold; border: 1px solid {self.adjust_color(accent_color, -30)}; }}
-            QToolBox::tab:selected {{ background: {accent_color}; color: {text_color_on_accent}; border: 1px solid {accent_color};}}
-            QToolBox QWidget {{ background-color: {self.adjust_color(widget_bg, 5)}; }}
-        """)
-        save_user_preference(self.user_id, "theme_color", color_name_key)
-
-    def is_light_color(self, hex_color):
-        color = QColor(hex_color)
-        return color.lightnessF() > 0.6
+        if self.preferences.theme_color != color_name_key:
+            self.theme_save_timer.start()
 
-    def adjust_color(self, hex_color, amount):
-        try:
-            color = QColor(hex_color)
-            h, s, l_val, a = color.getHslF()
-            
-            l_val = max(0.0, min(1.0, l_val + amount / 255.0))
-            
-            return QColor.fromHslF(h, s, l_val, a).name()
-        except Exception:
-            return hex_color
+    def _save_theme_color(self):
+        self.theme_save_timer.stop()
+        if self.preferences.theme_color != self.current_theme_color_name:
+            self.preferences.theme_color = self.current_theme_color_name
 
     def _create_menu_bar(self):
         menu_bar = self.menuBar()
@@ -519,7 +962,7 @@ class App(QMainWindow):
         settings_menu = menu_bar.addMenu("Ayarlar")
         settings_menu.setIcon(get_icon("settings"))
         theme_menu = settings_menu.addMenu(get_icon("theme"),"Tema Rengi Seç")
-        for color_name_key in self.color_map_themes.keys():
+        for color_name_key in THEME_PALETTES.keys():
             action = QAction(color_name_key, self)
             action.triggered.connect(lambda checked, c=color_name_key: self.apply_theme_color(c))
             theme_menu.addAction(action)
@@ -538,8 +981,7 @@ class App(QMainWindow):
         help_menu.addAction(about_action)
 
     def set_user_api_key(self):
-        global WEATHER_API_KEY
-        current_key = get_user_preference(self.user_id, "api_key") or ""
+        current_key = self.preferences.get("api_key", "")
         
         instructions_text = (
             "OpenWeatherMap API Anahtarı Nasıl Alınır:\n"
@@ -554,27 +996,35 @@ class App(QMainWindow):
                                            QLineEdit.Normal, current_key)
         if ok:
             if new_key.strip():
-                WEATHER_API_KEY = new_key.strip()
-                save_user_preference(self.user_id, "api_key", WEATHER_API_KEY)
+                self.preferences.api_key = new_key.strip()
                 QMessageBox.information(self, "API Anahtarı Güncellendi", "API anahtarınız güncellendi ve kaydedildi.")
                 self.auto_fetch_weather()
             else:
-                WEATHER_API_KEY = "YOUR_OPENWEATHERMAP_API_KEY"
-                save_user_preference(self.user_id, "api_key", None)
+                self.preferences.api_key = None
                 QMessageBox.information(self, "API Anahtarı Temizlendi", "Kaydedilmiş API anahtarınız temizlendi.")
-                if hasattr(self, 'temp_label'):
-                    self._reset_weather_labels_on_error(api_key_cleared=True)
 
 
     def set_default_city(self):
-        current_city = get_user_preference(self.user_id, 'city') or "Istanbul"
+        current_city = self.preferences.get("city", "Istanbul")
         new_city, ok = QInputDialog.getText(self, "Varsayılan Şehir", "Hava durumu için varsayılan şehri girin:", QLineEdit.Normal, current_city)
         if ok and new_city.strip():
-            save_user_preference(self.user_id, "city", new_city.strip())
+            self.preferences.city = new_city.strip()
             QMessageBox.information(self, "Şehir Güncellendi", f"Varsayılan şehir '{new_city.strip()}' olarak ayarlandı.")
-            if hasattr(self, 'city_input'): self.city_input.setText(new_city.strip())
             self.auto_fetch_weather()
 
+    def _on_preference_changed(self, key, value):
+        if key == "city" and hasattr(self, 'city_input'):
+            self.city_input.setText(value or "Istanbul")
+        elif key == "api_key" and not value and hasattr(self, 'temp_label'):
+            self.cancel_weather_fetch()
+            self._reset_weather_labels_on_error(api_key_cleared=True)
+
+    def _weather_api_key(self):
+        api_key = self.preferences.api_key
+        if not api_key or api_key == WEATHER_API_KEY_PLACEHOLDER:
+            return None
+        return api_key
+
     def logout_and_restart(self):
         self.close()
         QApplication.instance().setProperty("restart", True)
@@ -597,13 +1047,24 @@ class App(QMainWindow):
         self.tabs.addTab(self.tab_saglik, get_icon("health"), "Sağlık Takip")
         self.tabs.addTab(self.tab_hava_durumu, get_icon("weather"), "Hava Durumu")
         self.tabs.setIconSize(QSize(20, 20))
-        self.create_ana_sayfa_tab(self.tab_ana_sayfa)
-        self.create_gunluk_yaz_tab(self.tab_gunluk_yaz)
-        self.create_gunluklerim_tab(self.tab_gunluklerim)
-        self.create_saglik_tab(self.tab_saglik)
-        self.create_hava_durumu_tab(self.tab_hava_durumu)
+        self._pending_tab_builders = {
+            self.tab_ana_sayfa: self.create_ana_sayfa_tab,
+            self.tab_gunluk_yaz: self.create_gunluk_yaz_tab,
+            self.tab_gunluklerim: self.create_gunluklerim_tab,
+            self.tab_saglik: self.create_saglik_tab,
+            self.tab_hava_durumu: self.create_hava_durumu_tab,
+        }
+        self.ensure_tab_built(self.tabs.currentWidget())
         self.tabs.currentChanged.connect(self.on_tab_changed)
-        self.on_tab_changed(self.tabs.currentIndex())
+        QTimer.singleShot(0, lambda: self.on_tab_changed(self.tabs.currentIndex()))
+
+    def ensure_tab_built(self, tab):
+        builder = self._pending_tab_builders.pop(tab, None)
+        if builder is not None:
+            builder(tab)
+
+    def is_tab_built(self, tab):
+        return tab not in self._pending_tab_builders
 
     def center_window(self):
         qr = self.frameGeometry()
@@ -613,15 +1074,19 @@ class App(QMainWindow):
 
     def on_tab_changed(self, index):
         current_tab_widget = self.tabs.widget(index)
+        self.ensure_tab_built(current_tab_widget)
         if current_tab_widget == self.tab_gunluklerim:
-            self.load_diary_entries()
+            self.diary_model.refresh_if_changed()
         elif current_tab_widget == self.tab_saglik:
             if hasattr(self, 'health_calendar'):
                 self.health_calendar.setSelectedDate(QDate.currentDate())
                 self.load_health_data_for_date(QDate.currentDate())
         elif current_tab_widget == self.tab_hava_durumu:
             self.auto_fetch_weather()
+        if hasattr(self, 'weather_scheduler'):
+            self.weather_scheduler.set_tab_visible(current_tab_widget == self.tab_hava_durumu)
 
+    @timed("ui")
     def create_ana_sayfa_tab(self, tab):
         layout = QVBoxLayout(tab)
         layout.setContentsMargins(30,25,30,25)
@@ -634,7 +1099,7 @@ class App(QMainWindow):
         welcome_layout.addWidget(welcome_label)
         welcome_layout.addStretch()
         self.decorative_image_label = QLabel(self)
-        pixmap = QPixmap(ICON_PATHS.get("welcome_flower", ""))
+        pixmap = icon_registry.pixmap("welcome_flower")
         if not pixmap.isNull():
             self.decorative_image_label.setPixmap(pixmap.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation))
         else:
@@ -688,6 +1153,7 @@ class App(QMainWindow):
         layout.addWidget(quick_actions_group)
         layout.addStretch()
 
+    @timed("ui")
     def create_gunluk_yaz_tab(self, tab):
         layout = QVBoxLayout(tab)
         layout.setContentsMargins(20,20,20,20)
@@ -744,31 +1210,43 @@ class App(QMainWindow):
             QMessageBox.warning(self, "Eksik Bilgi", "Günlük içeriği boş olamaz.")
             return
 
-        add_diary_entry(self.user_id, title, content, mood, is_important)
+        entry_id = add_diary_entry(self.user_id, title, content, mood, is_important)
+        if hasattr(self, 'diary_model'):
+            self.diary_model.insert_entry(entry_id)
         QMessageBox.information(self, "Kaydedildi", "Günlüğün başarıyla kaydedildi.")
         self.diary_title_edit.clear()
         self.diary_text_area.clear()
         self.mood_combobox.setCurrentIndex(0)
         self.important_checkbox.setChecked(False)
-        if self.tabs.currentWidget() == self.tab_gunluklerim:
-            self.load_diary_entries()
 
+    @timed("ui")
     def create_gunluklerim_tab(self, tab):
         layout = QVBoxLayout(tab)
         layout.setContentsMargins(15,15,15,15)
-        self.diary_table = QTableWidget(self)
+        self.diary_search_edit = QLineEdit(self)
+        self.diary_search_edit.setPlaceholderText("Günlüklerde ara (başlık veya içerik)...")
+        self.diary_search_edit.setClearButtonEnabled(True)
+        self.diary_search_timer = QTimer(self)
+        self.diary_search_timer.setSingleShot(True)
+        self.diary_search_timer.setInterval(250)
+        self.diary_search_timer.timeout.connect(lambda: self.diary_model.set_search_query(self.diary_search_edit.text()))
+        self.diary_search_edit.textChanged.connect(self.diary_search_timer.start)
+        layout.addWidget(self.diary_search_edit)
+
+        self.diary_model = DiaryTableModel(self.user_id, parent=self)
+        self.diary_table = QTableView(self)
+        self.diary_table.setModel(self.diary_model)
         self.diary_table.setAlternatingRowColors(True)
-        self.diary_table.setColumnCount(6)
-        self.diary_table.setHorizontalHeaderLabels(["ID", "Tarih", "Başlık", "Ruh Hali", "Önemli", "Önizleme"])
         self.diary_table.setColumnHidden(0, True)
+        self.diary_table.verticalHeader().setVisible(False)
         self.diary_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
         self.diary_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
         self.diary_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
         self.diary_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
         self.diary_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
-        self.diary_table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.diary_table.setSelectionMode(QTableWidget.SingleSelection)
-        self.diary_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.diary_table.setSelectionBehavior(QTableView.SelectRows)
+        self.diary_table.setSelectionMode(QTableView.SingleSelection)
+        self.diary_table.setEditTriggers(QTableView.NoEditTriggers)
         self.diary_table.doubleClicked.connect(self.view_diary_entry_detail)
         layout.addWidget(self.diary_table)
 
@@ -786,42 +1264,9 @@ class App(QMainWindow):
         buttons_layout.addStretch()
         layout.addLayout(buttons_layout)
 
-    def load_diary_entries(self):
-        self.diary_table.setRowCount(0)
-        entries = get_diary_entries(self.user_id)
-        for row_num, entry_data in enumerate(entries):
-            self.diary_table.insertRow(row_num)
-            self.diary_table.setItem(row_num, 0, QTableWidgetItem(str(entry_data[0])))
-            try:
-                dt_obj = datetime.datetime.strptime(entry_data[1], "%Y-%m-%d %H:%M:%S")
-                formatted_date = dt_obj.strftime("%d.%m.%Y %H:%M")
-            except ValueError:
-                formatted_date = entry_data[1]
-            self.diary_table.setItem(row_num, 1, QTableWidgetItem(formatted_date))
-            self.diary_table.setItem(row_num, 2, QTableWidgetItem(entry_data[2] if entry_data[2] else ""))
-            self.diary_table.setItem(row_num, 3, QTableWidgetItem(entry_data[3] if entry_data[3] else ""))
-            
-            important_item = QTableWidgetItem()
-            if entry_data[4]:
-                important_item.setIcon(get_icon("important_star"))
-                important_item.setText(" Evet")
-            else:
-                important_item.setText("Hayır")
-            important_item.setTextAlignment(Qt.AlignCenter)
-            self.diary_table.setItem(row_num, 4, important_item)
-            
-            preview_text = (entry_data[5] if entry_data[5] else "")
-            if len(preview_text) == 50:
-                preview_text += "..."
-            self.diary_table.setItem(row_num, 5, QTableWidgetItem(preview_text))
-
-        self.diary_table.resizeColumnsToContents()
-        self.diary_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.diary_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.Stretch)
-
     def view_diary_entry_detail(self):
         selected_rows = self.diary_table.selectionModel().selectedRows()
-        current_row = self.diary_table.currentRow()
+        current_row = self.diary_table.currentIndex().row()
 
         if not selected_rows and current_row < 0 :
             QMessageBox.warning(self, "Seçim Yok", "Lütfen görüntülemek için bir günlük seçin.")
@@ -829,11 +1274,10 @@ class App(QMainWindow):
         
         actual_row_index = selected_rows[0].row() if selected_rows else current_row
 
-        entry_id_item = self.diary_table.item(actual_row_index, 0)
-        if not entry_id_item:
+        entry_id = self.diary_model.entry_id(actual_row_index)
+        if entry_id is None:
             QMessageBox.critical(self, "Hata", "Günlük ID'si alınamadı.")
             return
-        entry_id = int(entry_id_item.text())
         entry = get_diary_entry_by_id(entry_id)
 
         if entry:
@@ -842,7 +1286,6 @@ class App(QMainWindow):
             dialog_title_text = entry[0] if entry[0] else "Başlıksız Günlük"
             dialog.setWindowTitle(f"Günlük Detayı: {dialog_title_text}")
             dialog.setMinimumSize(550,450)
-            dialog.setStyleSheet(self.styleSheet())
 
             layout = QVBoxLayout(dialog)
             layout.setSpacing(10)
@@ -881,11 +1324,12 @@ class App(QMainWindow):
         reply = QMessageBox.question(self, "Silme Onayı", "Bu günlüğü kalıcı olarak silmek istediğinizden emin misiniz?",
                                      QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
         if reply == QMessageBox.Yes:
-            entry_id = int(self.diary_table.item(selected_rows[0].row(), 0).text())
+            entry_id = self.diary_model.entry_id(selected_rows[0].row())
             delete_diary_entry(entry_id)
-            self.load_diary_entries()
+            self.diary_model.remove_entry(entry_id)
             QMessageBox.information(self, "Silindi", "Günlük başarıyla silindi.")
 
+    @timed("ui")
     def create_saglik_tab(self, tab):
         main_layout = QHBoxLayout(tab)
         main_layout.setContentsMargins(15,15,15,15)
@@ -896,6 +1340,8 @@ class App(QMainWindow):
         self.health_calendar = QCalendarWidget(self)
         self.health_calendar.setVerticalHeaderFormat(QCalendarWidget.NoVerticalHeader)
         self.health_calendar.clicked[QDate].connect(self.load_health_data_for_date)
+        self.health_month_cache = HealthMonthCache(self.user_id)
+        self.health_calendar.currentPageChanged.connect(self.on_health_calendar_page_changed)
         calendar_layout.addWidget(self.health_calendar)
         main_layout.addWidget(calendar_group, 1)
 
@@ -944,15 +1390,56 @@ class App(QMainWindow):
         goals_layout.addRow(QLabel("Su İlerlemesi:"), self.water_progress)
         self.health_toolbox.addItem(goals_page, get_icon("important_star"),"Hedefler ve İlerleme")
 
+        trends_page = QWidget()
+        trends_layout = QFormLayout(trends_page)
+        trends_layout.setSpacing(10)
+
+        self.trends_range_combobox = QComboBox(self)
+        for label, days in (("Son 7 Gün", 7), ("Son 30 Gün", 30), ("Son 90 Gün", 90), ("Son 1 Yıl", 365)):
+            self.trends_range_combobox.addItem(label, days)
+        self.trends_range_combobox.setCurrentIndex(1)
+        self.trends_range_combobox.currentIndexChanged.connect(self.refresh_health_trends)
+        trends_layout.addRow(QLabel("Dönem:"), self.trends_range_combobox)
+
+        self.trends_water_label = QLabel("-", self)
+        trends_layout.addRow(QLabel("💧 Su:"), self.trends_water_label)
+        self.trends_exercise_label = QLabel("-", self)
+        trends_layout.addRow(QLabel("🏃 Egzersiz:"), self.trends_exercise_label)
+        self.trends_sleep_label = QLabel("-", self)
+        trends_layout.addRow(QLabel("😴 Uyku:"), self.trends_sleep_label)
+        self.trends_goal_label = QLabel("-", self)
+        self.trends_goal_label.setWordWrap(True)
+        trends_layout.addRow(QLabel("🎯 Su Hedefi:"), self.trends_goal_label)
+        self.trends_percentile_label = QLabel("-", self)
+        self.trends_percentile_label.setWordWrap(True)
+        trends_layout.addRow(QLabel("📊 Dağılım:"), self.trends_percentile_label)
+        self.trends_page = trends_page
+        self.health_toolbox.addItem(trends_page, get_icon("calendar"), "Eğilimler")
+        self.health_toolbox.currentChanged.connect(lambda index: self.refresh_health_trends())
+        self.water_goal_slider.valueChanged.connect(lambda val: self.refresh_health_trends())
+
         data_layout.addWidget(self.health_toolbox)
         main_layout.addWidget(data_entry_group, 2)
 
         self.health_calendar.setSelectedDate(QDate.currentDate())
+        self.on_health_calendar_page_changed(self.health_calendar.yearShown(), self.health_calendar.monthShown())
         self.load_health_data_for_date(QDate.currentDate())
 
+    def on_health_calendar_page_changed(self, year, month):
+        days = self.health_month_cache.get_month(year, month)
+        self.health_calendar.setDateTextFormat(QDate(), QTextCharFormat())
+        for date_str in days:
+            self.paint_health_calendar_day(date_str)
+
+    def paint_health_calendar_day(self, date_str):
+        logged_format = QTextCharFormat()
+        logged_format.setFontWeight(QFont.Bold)
+        logged_format.setBackground(QColor("#C8E6C9"))
+        self.health_calendar.setDateTextFormat(QDate.fromString(date_str, "yyyy-MM-dd"), logged_format)
+
     def load_health_data_for_date(self, q_date):
         date_str = q_date.toString("yyyy-MM-dd")
-        water, exercise, sleep = get_health_log(self.user_id, date_str)
+        water, exercise, sleep = self.health_month_cache.get_day(date_str)
         self.water_spinbox.setValue(water)
         self.exercise_spinbox.setValue(exercise)
         self.sleep_spinbox.setValue(sleep)
@@ -964,8 +1451,35 @@ class App(QMainWindow):
         exercise = self.exercise_spinbox.value()
         sleep = self.sleep_spinbox.value()
         update_health_log(self.user_id, selected_date, water, exercise, sleep)
+        self.health_month_cache.put_day(selected_date, (water, exercise, sleep))
+        self.paint_health_calendar_day(selected_date)
         QMessageBox.information(self, "Kaydedildi", f"{selected_date} için sağlık verileri kaydedildi.")
         self.update_health_progress()
+        self.refresh_health_trends()
+
+    @timed("ui")
+    def refresh_health_trends(self):
+        if self.health_toolbox.currentWidget() is not self.trends_page:
+            return
+        days = self.trends_range_combobox.currentData()
+        end_date = datetime.date.today()
+        series = load_health_series(self.user_id, end_date - datetime.timedelta(days=days - 1), end_date)
+        summary = summarize_health(series, self.water_goal_slider.value())
+        averages, rolling, percentiles = summary["averages"], summary["rolling"], summary["percentiles"]
+        if not summary["logged_days"]:
+            for label in (self.trends_water_label, self.trends_exercise_label, self.trends_sleep_label,
+                          self.trends_goal_label, self.trends_percentile_label):
+                label.setText("Bu dönemde kayıt yok.")
+            return
+        self.trends_water_label.setText(f"Ortalama {averages['water_ml']:.0f} ml, son 7 gün {rolling['water_ml'][-1]:.0f} ml/gün")
+        self.trends_exercise_label.setText(f"Ortalama {averages['exercise_km']:.1f} km, son 7 gün {rolling['exercise_km'][-1]:.1f} km/gün")
+        self.trends_sleep_label.setText(f"Ortalama {averages['sleep_hours']:.1f} saat, son 7 gün {rolling['sleep_hours'][-1]:.1f} saat/gün")
+        self.trends_goal_label.setText(f"Hedefe ulaşma oranı: %{summary['goal_hit_rate'] * 100:.0f} "
+                                       f"({summary['logged_days']}/{summary['days']} gün kayıtlı). "
+                                       f"Güncel seri: {summary['current_streak']} gün, en uzun seri: {summary['longest_streak']} gün")
+        water_p, sleep_p = percentiles["water_ml"], percentiles["sleep_hours"]
+        self.trends_percentile_label.setText(f"Su p10/p50/p90: {water_p[10]:.0f}/{water_p[50]:.0f}/{water_p[90]:.0f} ml, "
+                                             f"Uyku p10/p50/p90: {sleep_p[10]:.1f}/{sleep_p[50]:.1f}/{sleep_p[90]:.1f} saat")
 
     def update_health_progress(self):
         current_water = self.water_spinbox.value()
@@ -978,6 +1492,7 @@ class App(QMainWindow):
             self.water_progress.setValue(0)
             self.water_progress.setFormat("Hedef Belirlenmedi")
 
+    @timed("ui")
     def create_hava_durumu_tab(self, tab):
         layout = QVBoxLayout(tab)
         layout.setContentsMargins(20,20,20,20)
@@ -985,9 +1500,10 @@ class App(QMainWindow):
 
         input_layout = QHBoxLayout()
         self.city_input = QLineEdit(self)
-        default_city = get_user_preference(self.user_id, "city") or "Istanbul"
+        default_city = self.preferences.get("city", "Istanbul")
         self.city_input.setText(default_city)
         self.city_input.setPlaceholderText("Şehir adı girin (örn: London, TR)...")
+        self.city_input.textEdited.connect(lambda text: self.cancel_weather_fetch())
         input_layout.addWidget(self.city_input, 1)
 
         fetch_button = QPushButton(get_icon("fetch_weather"), " Hava Durumunu Getir", self)
@@ -1044,22 +1560,148 @@ class App(QMainWindow):
         self.suggestion_label.setAlignment(Qt.AlignCenter)
         suggestion_layout.addWidget(self.suggestion_label)
         layout.addWidget(self.clothing_suggestion_group)
-        
+
+        self.forecast_group = QGroupBox("Önümüzdeki Saatler", self)
+        forecast_layout = QVBoxLayout(self.forecast_group)
+        self.forecast_label = QLabel("Tahmin bilgisi bekleniyor...", self)
+        self.forecast_label.setWordWrap(True)
+        self.forecast_label.setAlignment(Qt.AlignCenter)
+        forecast_layout.addWidget(self.forecast_label)
+        layout.addWidget(self.forecast_group)
 
         self.last_fetch_label = QLabel("Son Güncelleme: Henüz Yok", self)
         self.last_fetch_label.setAlignment(Qt.AlignRight | Qt.AlignBottom)
         self.last_fetch_label.setStyleSheet("font-size: 9pt; color: gray;")
         layout.addWidget(self.last_fetch_label)
-        layout.addStretch()
+
+        dashboard_group = QGroupBox("Şehirlerim", self)
+        dashboard_layout = QVBoxLayout(dashboard_group)
+        self.city_dashboard_table = QTableWidget(self)
+        self.city_dashboard_table.setColumnCount(5)
+        self.city_dashboard_table.setHorizontalHeaderLabels(["Şehir", "Sıcaklık", "Durum", "Nem", "Rüzgar"])
+        self.city_dashboard_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.city_dashboard_table.verticalHeader().setVisible(False)
+        self.city_dashboard_table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.city_dashboard_table.setSelectionMode(QTableWidget.SingleSelection)
+        self.city_dashboard_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        dashboard_layout.addWidget(self.city_dashboard_table)
+
+        dashboard_buttons = QHBoxLayout()
+        add_city_button = QPushButton(get_icon("city_settings"), " Şehri Listeye Ekle", self)
+        add_city_button.clicked.connect(self.add_city_to_dashboard)
+        dashboard_buttons.addWidget(add_city_button)
+        remove_city_button = QPushButton(get_icon("delete", QStyle.SP_TrashIcon), " Seçili Şehri Kaldır", self)
+        remove_city_button.clicked.connect(self.remove_city_from_dashboard)
+        dashboard_buttons.addWidget(remove_city_button)
+        refresh_dashboard_button = QPushButton(get_icon("fetch_weather"), " Tümünü Yenile", self)
+        refresh_dashboard_button.clicked.connect(lambda: self.refresh_city_dashboard(force=True))
+        dashboard_buttons.addWidget(refresh_dashboard_button)
+        dashboard_buttons.addStretch()
+        self.city_dashboard_status_label = QLabel("", self)
+        self.city_dashboard_status_label.setStyleSheet("font-size: 9pt; color: gray;")
+        dashboard_buttons.addWidget(self.city_dashboard_status_label)
+        dashboard_layout.addLayout(dashboard_buttons)
+        layout.addWidget(dashboard_group)
+        self._dashboard_request_id = 0
+        self._dashboard_task = None
 
     def auto_fetch_weather(self):
-        city = get_user_preference(self.user_id, "city") or "Istanbul"
+        if not self.is_tab_built(self.tab_hava_durumu):
+            return
+        city = self.preferences.get("city", "Istanbul")
         if hasattr(self, 'city_input') and self.tabs.currentWidget() == self.tab_hava_durumu:
             input_city = self.city_input.text().strip()
             if input_city:
                 city = input_city
         if city:
             self.get_weather(city)
+        if hasattr(self, 'city_dashboard_table') and self.tabs.currentWidget() == self.tab_hava_durumu:
+            self.refresh_city_dashboard()
+
+    def _on_weather_refresh_due(self, prefetch):
+        if self._weather_api_key() is None:
+            return
+        self.ensure_tab_built(self.tab_hava_durumu)
+        self.auto_fetch_weather()
+
+    def add_city_to_dashboard(self):
+        city = self.city_input.text().strip()
+        if not city:
+            QMessageBox.warning(self, "Eksik Bilgi", "Lütfen bir şehir adı girin.")
+            return
+        if add_saved_city(self.user_id, city):
+            self.refresh_city_dashboard()
+
+    def remove_city_from_dashboard(self):
+        selected_rows = self.city_dashboard_table.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(self, "Seçim Yok", "Lütfen kaldırmak için bir şehir seçin.")
+            return
+        city = self.city_dashboard_table.item(selected_rows[0].row(), 0).data(Qt.UserRole)
+        remove_saved_city(self.user_id, city)
+        self.city_dashboard_table.removeRow(selected_rows[0].row())
+
+    def refresh_city_dashboard(self, force=False):
+        saved_cities = get_saved_cities(self.user_id)
+        results, stale_cities = {}, []
+        for city, city_id in saved_cities:
+            cached_data, fetched_at, is_fresh = (None, None, False) if force else weather_cache.get(city)
+            if cached_data is not None:
+                results[city] = cached_data
+            if not is_fresh:
+                stale_cities.append(city)
+        self._render_city_dashboard([city for city, city_id in saved_cities], results)
+        api_key = self._weather_api_key()
+        if not stale_cities:
+            return
+        if api_key is None:
+            self.city_dashboard_status_label.setText("API anahtarı eksik.")
+            return
+        self._dashboard_request_id += 1
+        task = WeatherDashboardTask(self._dashboard_request_id, self.user_id, stale_cities, dict(saved_cities), api_key)
+        task.signals.finished.connect(self._on_city_dashboard_fetched)
+        self._dashboard_task = task
+        self.city_dashboard_status_label.setText(f"{len(stale_cities)} şehir güncelleniyor...")
+        self.weather_thread_pool.start(task)
+
+    def _on_city_dashboard_fetched(self, request_id, results, unused):
+        if request_id != self._dashboard_request_id:
+            return
+        self._dashboard_task = None
+        cities = [city for city, city_id in get_saved_cities(self.user_id)]
+        for city in cities:
+            if city not in results:
+                cached_data, fetched_at, is_fresh = weather_cache.get(city)
+                if cached_data is not None:
+                    results[city] = cached_data
+        self._render_city_dashboard(cities, results)
+        failed = sum(1 for value in results.values() if isinstance(value, Exception))
+        self.city_dashboard_status_label.setText(
+            f"Son Güncelleme: {datetime.datetime.now().strftime('%H:%M:%S')}" + (f" ({failed} hata)" if failed else ""))
+
+    @timed("ui")
+    def _render_city_dashboard(self, cities, results):
+        table = self.city_dashboard_table
+        table.setUpdatesEnabled(False)
+        table.setRowCount(len(cities))
+        for row, city in enumerate(cities):
+            data = results.get(city)
+            city_item = QTableWidgetItem(city)
+            city_item.setData(Qt.UserRole, city)
+            table.setItem(row, 0, city_item)
+            if isinstance(data, dict):
+                try:
+                    values = [f"{data['main']['temp']:.1f}°C", data['weather'][0]['description'].capitalize(),
+                              f"%{data['main']['humidity']}", f"{data['wind']['speed']:.1f} m/s"]
+                except (KeyError, IndexError, TypeError):
+                    values = ["Hata", "-", "-", "-"]
+            elif isinstance(data, Exception):
+                values = ["Alınamadı", "-", "-", "-"]
+            else:
+                values = ["-", "-", "-", "-"]
+            for column, value in enumerate(values, 1):
+                table.setItem(row, column, QTableWidgetItem(value))
+        table.setUpdatesEnabled(True)
 
     def fetch_weather_manually(self):
         city = self.city_input.text().strip()
@@ -1068,12 +1710,11 @@ class App(QMainWindow):
             return
         self.get_weather(city)
 
+    @timed("ui")
     def get_weather(self, city_name):
-        global WEATHER_API_KEY
-        
-        user_specific_api_key = get_user_preference(self.user_id, "api_key")
+        api_key = self._weather_api_key()
 
-        if not user_specific_api_key and (not WEATHER_API_KEY or WEATHER_API_KEY == "YOUR_OPENWEATHERMAP_API_KEY"):
+        if api_key is None:
             instructions_text = (
                 "OpenWeatherMap API Anahtarı Nasıl Alınır?\n\n"
                 "1. Web Sitesi: Tarayıcınızdan https://openweathermap.org/ adresine gidin.\n"
@@ -1092,18 +1733,17 @@ class App(QMainWindow):
             formatted_instructions_text = instructions_text.replace('\n', '<br>')
             instructions_html = f"<p style='color:white;'>{formatted_instructions_text}</p>"
             
-            suggested_key_for_dialog = user_specific_api_key if user_specific_api_key else "7278da4b07af6e74ba7456cb79b95585"
+            suggested_key_for_dialog = "7278da4b07af6e74ba7456cb79b95585"
 
             new_key, ok = QInputDialog.getText(self, "OpenWeatherMap API Anahtarı Gerekli",
                                                instructions_html,
                                                QLineEdit.Normal, suggested_key_for_dialog)
             if ok and new_key.strip():
-                WEATHER_API_KEY = new_key.strip()
-                save_user_preference(self.user_id, "api_key", WEATHER_API_KEY)
+                api_key = new_key.strip()
+                self.preferences.api_key = api_key
                 QMessageBox.information(self, "API Anahtarı Kaydedildi", "API anahtarınız bu kullanıcı için kaydedildi ve kullanılacak.")
             elif ok and not new_key.strip():
-                WEATHER_API_KEY = "YOUR_OPENWEATHERMAP_API_KEY"
-                save_user_preference(self.user_id, "api_key", None)
+                self.preferences.api_key = None
                 QMessageBox.warning(self, "API Anahtarı Temizlendi", "API anahtarı alanı boş bırakıldığı için kaydedilmiş anahtar temizlendi. Hava durumu bilgisi alınamayacak.")
                 self._reset_weather_labels_on_error(api_key_cleared=True)
                 return
@@ -1111,60 +1751,133 @@ class App(QMainWindow):
                 self._reset_weather_labels_on_error(api_key_missing=True)
                 QMessageBox.warning(self, "API Anahtarı Girilmedi", "API anahtarı girilmediği için hava durumu bilgisi alınamıyor.")
                 return
-        elif user_specific_api_key and WEATHER_API_KEY != user_specific_api_key:
-            WEATHER_API_KEY = user_specific_api_key
-        elif not WEATHER_API_KEY or WEATHER_API_KEY == "YOUR_OPENWEATHERMAP_API_KEY":
-            QMessageBox.critical(self, "API Anahtarı Sorunu", "API anahtarı bulunamadı. Lütfen Ayarlar menüsünden API anahtarınızı girin.")
-            self._reset_weather_labels_on_error(api_key_missing=True)
-            return
 
+        self.cancel_weather_fetch()
+        self._weather_city = city_name
+        cached_data, fetched_at, is_fresh = weather_cache.get(city_name)
+        if is_fresh:
+            self._show_weather(cached_data, None, fetched_at, from_cache=True)
+            return
+        forecast_data, forecast_fetched_at = forecast_store.current(city_name)
+        if forecast_data is not None:
+            self._show_weather(forecast_data, None, forecast_fetched_at, from_cache=True, forecast=True)
+            return
+        if cached_data is not None:
+            self._show_weather(cached_data, None, fetched_at, from_cache=True)
+        self._weather_revalidating = cached_data is not None
+        task = WeatherFetchTask(self._weather_request_id, city_name, api_key)
+        task.signals.finished.connect(self._on_weather_fetched)
+        task.signals.failed.connect(self._on_weather_failed)
+        self._weather_task = task
+        self.weather_thread_pool.start(task)
+
+    def cancel_weather_fetch(self):
+        self._weather_request_id += 1
+        if self._weather_task is not None:
+            self._weather_task.cancelled = True
+            self._weather_task = None
+
+    def _on_weather_fetched(self, request_id, data, icon_data):
+        if request_id != self._weather_request_id:
+            return
+        self._weather_task = None
+        self._show_weather(data, icon_data, time.time())
 
-        params = {"q": city_name, "appid": WEATHER_API_KEY, "units": "metric", "lang": "tr"}
+    @timed("ui")
+    def _show_weather(self, data, icon_data, fetched_at, from_cache=False, forecast=False):
         try:
-            response = requests.get(WEATHER_BASE_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-
             self.city_name_label.setText(f"Şehir: {data['name']}, {data['sys']['country']}")
             self.temp_label.setText(f"Sıcaklık: {data['main']['temp']:.1f}°C")
             self.feels_like_label.setText(f"Hissedilen: {data['main']['feels_like']:.1f}°C")
             self.condition_label.setText(f"Durum: {data['weather'][0]['description'].capitalize()}")
             self.humidity_label.setText(f"Nem: %{data['main']['humidity']}")
             self.wind_label.setText(f"Rüzgar: {data['wind']['speed']:.1f} m/s")
-            self.last_fetch_label.setText(f"Son Güncelleme: {datetime.datetime.now().strftime('%d.%m.%Y %H:%M:%S')}")
-            
-            icon_code = data['weather'][0]['icon']
-            icon_url = f"http://openweathermap.org/img/wn/{icon_code}@2x.png"
-            try:
-                icon_data_response = requests.get(icon_url, timeout=5)
-                icon_data_response.raise_for_status()
-                icon_data = icon_data_response.content
-                pixmap = QPixmap()
-                if pixmap.loadFromData(icon_data):
-                    self.weather_icon_label.setPixmap(pixmap.scaled(self.weather_icon_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                else:
-                    self.weather_icon_label.setText("İkon Yüklenemedi")
-            except requests.exceptions.RequestException as icon_err:
+            fetched_text = datetime.datetime.fromtimestamp(fetched_at).strftime('%d.%m.%Y %H:%M:%S')
+            source_text = " (tahmin)" if forecast else " (önbellek)" if from_cache else ""
+            self.last_fetch_label.setText(f"Son Güncelleme: {fetched_text}{source_text}")
+            cache_stats = weather_cache.stats()
+            flight_stats = weather_client.single_flight.stats()
+            self.last_fetch_label.setToolTip(f"Önbellek: {cache_stats['hits']} isabet, {cache_stats['stale_hits']} eski, "
+                                             f"{cache_stats['misses']} ıska\n"
+                                             f"İstek: {flight_stats['calls']} gönderildi, "
+                                             f"{flight_stats['suppressed']} tekrar birleştirildi")
+
+            icon_code = data['weather'][0].get('icon')
+            pixmap = self._weather_icon_pixmap(icon_code, icon_data) if icon_code else None
+            if pixmap is not None:
+                self.weather_icon_label.setPixmap(pixmap)
+            elif from_cache:
+                self.weather_icon_label.clear()
+            elif icon_data is None:
                 self.weather_icon_label.setText("İkon Alınamadı")
-            
-            self.generate_clothing_suggestion(data['main']['temp'], data['weather'][0]['main'], data['wind']['speed'])
+            else:
+                self.weather_icon_label.setText("İkon Yüklenemedi")
+
+            upcoming = forecast_store.upcoming(self._weather_city) if self._weather_city else []
+            self._show_forecast_preview(upcoming)
+            rain_chance = max([slot['pop'] for slot in upcoming], default=None)
+            self.generate_clothing_suggestion(data['main']['temp'], data['weather'][0]['main'], data['wind']['speed'],
+                                              rain_chance)
+            if hasattr(self, 'weather_scheduler'):
+                self.weather_scheduler.note_result(data, time.time() if forecast else fetched_at)
+        except Exception as e:
+            QMessageBox.critical(self, "Beklenmedik Hata", f"Hava durumu işlenirken bir hata oluştu: {e}")
+            self._reset_weather_labels_on_error()
 
-        except requests.exceptions.HTTPError as http_err:
-            if http_err.response.status_code == 401:
+    def _show_forecast_preview(self, upcoming):
+        if not upcoming:
+            self.forecast_label.setText("Tahmin bilgisi yok.")
+            return
+        self.forecast_label.setText("   ".join(
+            f"{datetime.datetime.fromtimestamp(slot['dt']).strftime('%H:%M')}  {slot['main']['temp']:.0f}°C "
+            f"{slot['weather'][0]['description']}" for slot in upcoming))
+
+    def _weather_icon_pixmap(self, icon_code, icon_data=None):
+        size = self.weather_icon_label.size()
+        cache_key = f"weather_icon:{icon_code}:{size.width()}x{size.height()}"
+        pixmap = QPixmapCache.find(cache_key)
+        if pixmap is not None:
+            return pixmap
+        if icon_data is None:
+            icon_data = get_weather_icon_bytes(icon_code)
+            if icon_data is None:
+                return None
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(icon_data):
+            return None
+        pixmap = pixmap.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        QPixmapCache.insert(cache_key, pixmap)
+        return pixmap
+
+    def _on_weather_failed(self, request_id, city_name, error_kind, status_code, message):
+        if request_id != self._weather_request_id:
+            return
+        self._weather_task = None
+        self.weather_scheduler.note_error()
+        if not self.weather_scheduler.tab_visible:
+            return
+        if self._weather_revalidating and error_kind == "connection":
+            return
+        if error_kind == "http":
+            if status_code == 401:
                 QMessageBox.critical(self, "API Hatası", "API Anahtarı geçersiz veya hatalı. Lütfen Ayarlar menüsünden veya bir sonraki denemede geçerli bir anahtar girin.")
                 self._reset_weather_labels_on_error(api_key_invalid=True)
-            elif http_err.response.status_code == 404:
+            elif status_code == 404:
                 QMessageBox.warning(self, "Bulunamadı", f"Şehir '{city_name}' bulunamadı. Lütfen şehir adını kontrol edin.")
                 self._reset_weather_labels_on_error()
             else:
-                QMessageBox.critical(self, "HTTP Hatası", f"Hava durumu alınırken bir HTTP hatası oluştu: {http_err}")
+                QMessageBox.critical(self, "HTTP Hatası", f"Hava durumu alınırken bir HTTP hatası oluştu: {message}")
                 self._reset_weather_labels_on_error()
-        except requests.exceptions.RequestException as e:
+        elif error_kind == "connection":
+            forecast_data, forecast_fetched_at = forecast_store.current(city_name, allow_expired=True)
+            if forecast_data is not None:
+                self._show_weather(forecast_data, None, forecast_fetched_at, from_cache=True, forecast=True)
+                self.last_fetch_label.setText(self.last_fetch_label.text() + " - çevrimdışı")
+                return
             self._reset_weather_labels_on_error(connection_error=True)
-            QMessageBox.warning(self, "Bağlantı Sorunu", f"Hava durumu bilgisi alınamadı. İnternet bağlantınızı kontrol edin veya API sunucusunda bir sorun olabilir.\nDetay: {e}")
-        except Exception as e:
-            detailed_traceback = traceback.format_exc()
-            QMessageBox.critical(self, "Beklenmedik Hata", f"Hava durumu işlenirken bir hata oluştu: {e}")
+            QMessageBox.warning(self, "Bağlantı Sorunu", f"Hava durumu bilgisi alınamadı. İnternet bağlantınızı kontrol edin veya API sunucusunda bir sorun olabilir.\nDetay: {message}")
+        else:
+            QMessageBox.critical(self, "Beklenmedik Hata", f"Hava durumu işlenirken bir hata oluştu: {message}")
             self._reset_weather_labels_on_error()
 
 
@@ -1195,7 +1908,7 @@ class App(QMainWindow):
         if not api_key_missing and not api_key_invalid and not api_key_cleared : self.weather_icon_label.clear()
 
 
-    def generate_clothing_suggestion(self, temp, condition_main, wind_speed):
+    def generate_clothing_suggestion(self, temp, condition_main, wind_speed, rain_chance=None):
         suggestion = ""
         if temp > 28:
             suggestion = "Çok sıcak! ☀ İnce ve açık renkli kıyafetler, şort, tişört, sandalet. Bol su için ve güneşten korunun."
@@ -1217,6 +1930,9 @@ class App(QMainWindow):
         elif "Clear" in condition_main and temp > 15:
             suggestion += " Güneşli bir gün, güneş gözlüğü iyi bir fikir. 😎"
         
+        if rain_chance is not None and rain_chance >= 0.5 and not ("Rain" in condition_main or "Drizzle" in condition_main):
+            suggestion += f" Önümüzdeki saatlerde yağış ihtimali %{rain_chance * 100:.0f}, şemsiye almanızda fayda var. ☔"
+
         if wind_speed > 7:
             suggestion += f" Rüzgarlı ({wind_speed:.1f} m/s)! Rüzgar kesen bir giysi faydalı olacaktır. 🌬"
         elif "Wind" in condition_main and temp < 15 :
@@ -1226,8 +1942,11 @@ class App(QMainWindow):
 
 
 def main():
+    pending = init_db()
     app = QApplication(sys.argv)
     app.setProperty("restart", False)
+    if pending and not run_online_migrations():
+        sys.exit(1)
 
     login_dialog = LoginDialog()
     if login_dialog.exec_() == QDialog.Accepted and login_dialog.user_data:
@@ -1256,5 +1975,18 @@ def main():
     else:
         sys.exit()
 
+def icons_main(argv=None):
+    parser = argparse.ArgumentParser(description="icons/ dizinindeki simgeleri tek bir paket dosyasında toplar")
+    parser.add_argument("command", choices=["pack"])
+    parser.add_argument("--output", default=ICON_BUNDLE_FILE)
+    args = parser.parse_args(argv)
+    count = pack_icons(ICON_PATHS, args.output)
+    print(f"{count}/{len(ICON_PATHS)} simge '{args.output}' dosyasına paketlendi.")
+    return 0
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in CLI_COMMANDS:
+        sys.exit(cli_main(sys.argv[1:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "icons":
+        sys.exit(icons_main(sys.argv[2:]))
     main()
\ No newline at end of file
@@ -0,0 +1,278 @@
+import sys
+import os
+import json
+import time
+import datetime
+import argparse
+import getpass
+import sqlite3
+
+from veritabani import (DIARY_PAGE_SIZE, HEALTH_ROLLUP_CHUNK_SIZE, HEALTH_ROLLUP_WORKERS, TRANSFER_FORMATS, add_diary_entry,
+                        check_health_rollups, check_user, export_diary_entries, export_health_logs, forecast_store,
+                        get_diary_entries, get_diary_entries_page, get_health_log, get_user_preference,
+                        import_diary_entries, import_health_logs, init_db, rebuild_health_rollups, run_migrations,
+                        search_diary_entries, update_health_log, weather_cache)
+from hava_durumu import WEATHER_API_KEY_PLACEHOLDER, classify_weather_error, weather_client
+
+CLI_USER_ENV = "KISISEL_ASISTAN_USER"
+CLI_PASSWORD_ENV = "KISISEL_ASISTAN_PASSWORD"
+CLI_LIST_LIMIT = 20
+CLI_SEARCH_HIGHLIGHT = ("[", "]")
+DIARY_LIST_FIELDS = ["id", "entry_date", "title", "mood", "is_important", "preview"]
+
+TRANSFER_HANDLERS = {
+    ("export", "diary"): export_diary_entries,
+    ("export", "health"): export_health_logs,
+    ("import", "diary"): import_diary_entries,
+    ("import", "health"): import_health_logs,
+}
+
+def _error(message):
+    print(message, file=sys.stderr)
+    return 1
+
+def _transfer_format(path, fmt):
+    return fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+
+def _report_progress(done, total):
+    suffix = f"/{total}" if total is not None else ""
+    print(f"\r{done}{suffix} kayıt işlendi", end="", file=sys.stderr, flush=True)
+
+def _report_migration(number, done, total):
+    print(f"\rVeritabanı güncelleniyor (adım {number})... {done}/{total}", end="", file=sys.stderr, flush=True)
+
+def _migrate():
+    if init_db():
+        run_migrations(progress_callback=_report_migration)
+        print(file=sys.stderr)
+
+def _login(username, args):
+    password = args.password
+    if password is None:
+        password = os.environ.get(CLI_PASSWORD_ENV)
+    if password is None:
+        password = getpass.getpass("Parola: ")
+    return check_user(username, password)
+
+def _print_rows(rows, as_json):
+    for row in rows:
+        if as_json:
+            print(json.dumps(dict(zip(DIARY_LIST_FIELDS, row)), ensure_ascii=False))
+        else:
+            entry_id, entry_date, title, mood, is_important, preview = row
+            marker = "*" if is_important else " "
+            print(f"{entry_id}\t{entry_date}\t{marker} {title or '(Başlıksız)'}\t{mood or ''}\t{(preview or '').replace(chr(10), ' ')}")
+
+def _iter_diary_entries(user_id, limit):
+    if not limit:
+        yield from get_diary_entries(user_id)
+        return
+    after = None
+    while limit > 0:
+        page = get_diary_entries_page(user_id, min(limit, DIARY_PAGE_SIZE), after)
+        yield from page
+        if len(page) < min(limit, DIARY_PAGE_SIZE):
+            return
+        limit -= len(page)
+        after = (page[-1][1], page[-1][0])
+
+def add_command(user, args):
+    if args.bulk:
+        count = import_diary_entries(user["id"], sys.stdin, args.format or "jsonl")
+        print(f"{count} günlük girdisi eklendi.", file=sys.stderr)
+        return 0
+    content = args.content if args.content not in (None, "-") else sys.stdin.read()
+    if not content.strip():
+        return _error("Günlük içeriği boş olamaz!")
+    entry_id = add_diary_entry(user["id"], args.title, content.strip(), args.mood, args.important)
+    print(entry_id)
+    return 0
+
+def list_command(user, args):
+    _print_rows(_iter_diary_entries(user["id"], args.limit), args.json)
+    return 0
+
+def search_command(user, args):
+    highlight = ("", "") if args.json else CLI_SEARCH_HIGHLIGHT
+    rows = search_diary_entries(user["id"], " ".join(args.query), args.limit, args.offset, highlight)
+    _print_rows(rows, args.json)
+    return 0
+
+def transfer_command(user, args):
+    fmt = _transfer_format(args.path, args.format)
+    handler = TRANSFER_HANDLERS[(args.command, args.kind)]
+    mode = "r" if args.command == "import" else "w"
+    if args.path == "-":
+        fileobj = sys.stdin if mode == "r" else sys.stdout
+        count = handler(user["id"], fileobj, fmt, _report_progress)
+    else:
+        with open(args.path, mode, encoding="utf-8", newline="") as fileobj:
+            count = handler(user["id"], fileobj, fmt, _report_progress)
+    print(f"\nToplam {count} kayıt işlendi.", file=sys.stderr)
+    return 0
+
+def log_health_command(user, args):
+    if args.bulk:
+        count = import_health_logs(user["id"], sys.stdin, args.format or "jsonl")
+        print(f"{count} günlük sağlık kaydı işlendi.", file=sys.stderr)
+        return 0
+    date_str = args.date or datetime.date.today().strftime("%Y-%m-%d")
+    try:
+        datetime.datetime.strptime(date_str, "%Y-%m-%d")
+    except ValueError:
+        return _error(f"Geçersiz tarih: {date_str} (beklenen: YYYY-AA-GG)")
+    water_ml, exercise_km, sleep_hours = get_health_log(user["id"], date_str)
+    if args.water is not None:
+        water_ml = args.water
+    if args.exercise is not None:
+        exercise_km = args.exercise
+    if args.sleep is not None:
+        sleep_hours = args.sleep
+    update_health_log(user["id"], date_str, water_ml, exercise_km, sleep_hours)
+    print(f"{date_str}\tsu={water_ml} ml\tegzersiz={exercise_km:.1f} km\tuyku={sleep_hours:.1f} saat")
+    return 0
+
+def _print_weather(data, fetched_at, source, as_json):
+    if as_json:
+        print(json.dumps({"fetched_at": fetched_at, "source": source, "data": data}, ensure_ascii=False))
+        return
+    fetched_text = datetime.datetime.fromtimestamp(fetched_at).strftime('%d.%m.%Y %H:%M:%S')
+    source_text = {"forecast": " (tahmin)", "cache": " (önbellek)"}.get(source, "")
+    print(f"Şehir: {data['name']}, {data['sys']['country']}")
+    print(f"Sıcaklık: {data['main']['temp']:.1f}°C (hissedilen {data['main']['feels_like']:.1f}°C)")
+    print(f"Durum: {data['weather'][0]['description'].capitalize()}")
+    print(f"Nem: %{data['main']['humidity']}  Rüzgar: {data['wind']['speed']:.1f} m/s")
+    print(f"Son Güncelleme: {fetched_text}{source_text}")
+
+def weather_command(user, args):
+    city = " ".join(args.city) or get_user_preference(user["id"], "city") or "Istanbul"
+    cached_data, fetched_at, is_fresh = weather_cache.get(city)
+    if is_fresh and not args.refresh:
+        _print_weather(cached_data, fetched_at, "cache", args.json)
+        return 0
+    api_key = args.api_key or get_user_preference(user["id"], "api_key")
+    if not api_key or api_key == WEATHER_API_KEY_PLACEHOLDER:
+        return _error("OpenWeatherMap API anahtarı bulunamadı. --api-key ile verin veya uygulamadan kaydedin.")
+    try:
+        data = weather_client.fetch_current(city, api_key)
+        weather_client.refresh_forecast(city, api_key)
+        _print_weather(data, time.time(), "network", args.json)
+        return 0
+    except Exception as e:
+        kind, status = classify_weather_error(e)
+        if kind == "http" and status == 401:
+            return _error("API anahtarı geçersiz veya yetkisiz.")
+        if kind == "http" and status == 404:
+            return _error(f"'{city}' şehri bulunamadı.")
+        if kind == "unexpected":
+            return _error(f"Hava durumu alınırken beklenmedik bir hata oluştu: {e}")
+        forecast_data, forecast_fetched_at = forecast_store.current(city)
+        if forecast_data is not None:
+            _print_weather(forecast_data, forecast_fetched_at, "forecast", args.json)
+        elif cached_data is not None:
+            _print_weather(cached_data, fetched_at, "cache", args.json)
+        else:
+            return _error(f"Hava durumu sunucusuna bağlanılamadı: {e}")
+        print("Uyarı: bağlantı kurulamadı, kayıtlı veri gösteriliyor.", file=sys.stderr)
+        return 0
+
+def rollups_command(args):
+    if args.action == "rebuild":
+        counts = rebuild_health_rollups(args.workers, args.chunk_size)
+        print(f"Özetler yeniden oluşturuldu: {counts['weekly']} haftalık, {counts['monthly']} aylık satır.")
+        return 0
+    mismatches = check_health_rollups(args.workers, args.chunk_size)
+    for period, user_id, key, actual, expected in mismatches:
+        print(f"{period} kullanıcı={user_id} dönem={key}: kayıtlı={actual} beklenen={expected}")
+    print("Özetler tutarlı." if not mismatches else f"{len(mismatches)} tutarsızlık bulundu.")
+    return 0 if not mismatches else 1
+
+USER_COMMANDS = {
+    "add": add_command,
+    "list": list_command,
+    "search": search_command,
+    "export": transfer_command,
+    "import": transfer_command,
+    "log-health": log_health_command,
+    "weather": weather_command,
+}
+CLI_COMMANDS = tuple(USER_COMMANDS) + ("rollups",)
+
+def build_parser():
+    account = argparse.ArgumentParser(add_help=False)
+    account.add_argument("--user", help=f"Kullanıcı adı (varsayılan: ${CLI_USER_ENV})")
+    account.add_argument("--password", help=f"Parola (verilmezse ${CLI_PASSWORD_ENV} kullanılır ya da sorulur)")
+
+    parser = argparse.ArgumentParser(prog="kisisel-asistan", description="Kişisel Asistanım komut satırı arayüzü")
+    commands = parser.add_subparsers(dest="command", metavar="komut")
+    commands.required = True
+
+    add = commands.add_parser("add", parents=[account], help="Günlük girdisi ekler")
+    add.add_argument("content", nargs="?", help="Girdi içeriği ('-' veya verilmezse standart girişten okunur)")
+    add.add_argument("--title")
+    add.add_argument("--mood")
+    add.add_argument("--important", action="store_true", help="Girdiyi önemli olarak işaretler")
+    add.add_argument("--bulk", action="store_true", help="Standart girişten her satırda bir girdi okur")
+    add.add_argument("--format", choices=TRANSFER_FORMATS, help="--bulk biçimi (varsayılan: jsonl)")
+
+    listing = commands.add_parser("list", parents=[account], help="Günlük girdilerini listeler")
+    listing.add_argument("--limit", type=int, default=CLI_LIST_LIMIT, help="En fazla kaç girdi (0: tümü)")
+    listing.add_argument("--json", action="store_true", help="Her satıra bir JSON nesnesi yazar")
+
+    search = commands.add_parser("search", parents=[account], help="Günlükte tam metin arama yapar")
+    search.add_argument("query", nargs="+")
+    search.add_argument("--limit", type=int, default=CLI_LIST_LIMIT)
+    search.add_argument("--offset", type=int, default=0)
+    search.add_argument("--json", action="store_true", help="Her satıra bir JSON nesnesi yazar")
+
+    for action, help_text in (("export", "Verileri dışa aktarır"), ("import", "Verileri içe aktarır")):
+        transfer = commands.add_parser(action, parents=[account], help=help_text)
+        transfer.add_argument("kind", choices=["diary", "health"])
+        transfer.add_argument("path", help="Dosya yolu ('-' standart giriş/çıkış)")
+        transfer.add_argument("--format", choices=TRANSFER_FORMATS, help="Dosya biçimi (varsayılan: uzantıdan)")
+
+    health = commands.add_parser("log-health", parents=[account], help="Günlük sağlık kaydı girer")
+    health.add_argument("--date", help="YYYY-AA-GG (varsayılan: bugün)")
+    health.add_argument("--water", type=int, help="Su (ml)")
+    health.add_argument("--exercise", type=float, help="Egzersiz (km)")
+    health.add_argument("--sleep", type=float, help="Uyku (saat)")
+    health.add_argument("--bulk", action="store_true", help="Standart girişten log_date, water_ml, exercise_km, sleep_hours okur")
+    health.add_argument("--format", choices=TRANSFER_FORMATS, help="--bulk biçimi (varsayılan: jsonl)")
+
+    weather = commands.add_parser("weather", parents=[account], help="Güncel hava durumunu gösterir")
+    weather.add_argument("city", nargs="*", help="Şehir (varsayılan: kayıtlı şehir)")
+    weather.add_argument("--api-key", help="OpenWeatherMap API anahtarı (varsayılan: kayıtlı anahtar)")
+    weather.add_argument("--refresh", action="store_true", help="Önbelleği atlayıp sunucudan çeker")
+    weather.add_argument("--json", action="store_true")
+
+    rollups = commands.add_parser("rollups", help="Sağlık özet tablolarını yeniden oluşturur veya doğrular")
+    rollups.add_argument("action", choices=["rebuild", "check"])
+    rollups.add_argument("--workers", type=int, default=HEALTH_ROLLUP_WORKERS)
+    rollups.add_argument("--chunk-size", type=int, default=HEALTH_ROLLUP_CHUNK_SIZE, help="İş parçacığı başına kullanıcı sayısı")
+    return parser
+
+def run_command(args):
+    _migrate()
+    if args.command == "rollups":
+        return rollups_command(args)
+    username = args.user or os.environ.get(CLI_USER_ENV)
+    if not username:
+        return _error(f"Kullanıcı adı gerekli: --user verin veya ${CLI_USER_ENV} tanımlayın.")
+    user = _login(username, args)
+    if not user:
+        return _error("Kullanıcı adı veya parola hatalı!")
+    return USER_COMMANDS[args.command](user, args)
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run_command(args)
+    except sqlite3.Error as e:
+        return _error(f"Veritabanı hatası: {e}")
+    except (ValueError, KeyError) as e:
+        return _error(f"Girdi işlenemedi: {e}")
+    except OSError as e:
+        return _error(f"Dosya hatası: {e}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import os
+import time
+import threading
+import json
+from functools import wraps
+
+METRICS_ENV_VAR = "KISISEL_ASISTAN_METRICS"
+METRICS_JSONL_FILE = "kisisel_asistan_metrics.jsonl"
+METRICS_PROMETHEUS_FILE = "kisisel_asistan_metrics.prom"
+METRICS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class LatencyHistogram:
+    def __init__(self, name, category, buckets=METRICS_BUCKETS):
+        self.name = name
+        self.category = category
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(self.buckets) and seconds > self.buckets[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else self.max
+        return self.max
+
+    def as_dict(self):
+        return {"name": self.name, "category": self.category, "count": self.count, "sum": self.total, "max": self.max,
+                "buckets": dict(zip([str(bound) for bound in self.buckets] + ["+Inf"], self.counts))}
+
+class _Span:
+    __slots__ = ("instrumentation", "name", "category", "started")
+
+    def __init__(self, instrumentation, name, category):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.category = category
+        self.started = None
+
+    def __enter__(self):
+        if self.instrumentation.enabled:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.started is not None:
+            self.instrumentation.record(self.name, self.category, time.perf_counter() - self.started)
+        return False
+
+class Instrumentation:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+    def record(self, name, category, seconds):
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = LatencyHistogram(name, category)
+            histogram.observe(seconds)
+
+    def span(self, name, category):
+        return _Span(self, name, category)
+
+    def timed(self, category, name=None):
+        def decorator(fn):
+            metric_name = name or fn.__qualname__
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(metric_name, category, time.perf_counter() - started)
+            return wrapper
+        return decorator
+
+    def histograms(self):
+        with self._lock:
+            return sorted(self._histograms.values(), key=lambda histogram: (histogram.category, histogram.name))
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def write_jsonl(self, path=METRICS_JSONL_FILE):
+        timestamp = time.time()
+        with open(path, "a", encoding="utf-8") as f:
+            for histogram in self.histograms():
+                f.write(json.dumps(dict(histogram.as_dict(), timestamp=timestamp), ensure_ascii=False) + "\n")
+
+    def write_prometheus(self, path=METRICS_PROMETHEUS_FILE):
+        lines = ["# HELP kisisel_asistan_latency_seconds Latency of instrumented calls.",
+                 "# TYPE kisisel_asistan_latency_seconds histogram"]
+        for histogram in self.histograms():
+            labels = f'name="{histogram.name}",category="{histogram.category}"'
+            cumulative = 0
+            for bound, count in zip([str(bound) for bound in histogram.buckets] + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'kisisel_asistan_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"kisisel_asistan_latency_seconds_sum{{{labels}}} {histogram.total}")
+            lines.append(f"kisisel_asistan_latency_seconds_count{{{labels}}} {histogram.count}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+instrumentation = Instrumentation(enabled=os.environ.get(METRICS_ENV_VAR, "") not in ("", "0"))
+timed = instrumentation.timed
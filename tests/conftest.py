@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import veritabani
+
+SHIPPED_DATABASE = os.path.join(ROOT, veritabani.DATABASE_NAME)
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(veritabani, "DATABASE_NAME", str(tmp_path / "test.db"))
+    yield veritabani.DATABASE_NAME
+    veritabani.get_db().close_all()
@@ -0,0 +1,53 @@
+import threading
+
+import veritabani as V
+import hava_durumu as H
+
+def fill_health(users, days):
+    V.init_db()
+    for user in range(users):
+        V.add_user(f"u{user}", "pw", "", "")
+    with V.get_db().transaction() as cursor:
+        cursor.executemany(V.HEALTH_UPSERT_SQL, [(user_id, f"2024-01-{day:02d}", 1000, 1.0, 7.0)
+                                                for user_id in range(1, users + 1) for day in range(1, days + 1)])
+
+def test_repeated_rebuilds_do_not_leak_connections(database):
+    fill_health(users=12, days=20)
+    V.rebuild_health_rollups(workers=4, chunk_size=2)
+    connections = V.get_db().open_connections()
+    for _ in range(10):
+        V.rebuild_health_rollups(workers=4, chunk_size=2)
+        assert V.check_health_rollups(workers=4, chunk_size=2) == []
+    assert V.get_db().open_connections() == connections == 1
+
+def test_fetch_many_releases_its_worker_connections(database):
+    V.init_db()
+    client = H.WeatherClient()
+
+    def fetch_current(city, api_key):
+        data = {"name": city, "id": 0}
+        V.weather_cache.put(city, data)
+        return data
+
+    client.fetch_current = fetch_current
+    V.get_db().connection()
+    for _ in range(5):
+        results = client.fetch_many([f"Şehir {i}" for i in range(6)], "anahtar")
+        assert len(results) == 6
+    assert V.get_db().open_connections() == 1
+
+def test_released_thread_reopens_on_next_use(database):
+    V.init_db()
+
+    @V.releases_connection
+    def count_users():
+        return V.get_db().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    counts = []
+    threads = [threading.Thread(target=lambda: counts.extend([count_users(), count_users()])) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counts == [0] * 8
+    assert V.get_db().open_connections() == 1
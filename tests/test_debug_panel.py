@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+K = pytest.importorskip("kişiselAsistanım")
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+def test_refresh_timer_only_runs_while_the_panel_is_shown(qapp):
+    panel = K.DebugPanel()
+    try:
+        assert not panel.refresh_timer.isActive()
+        panel.show()
+        assert panel.refresh_timer.isActive()
+        panel.close()
+        assert not panel.refresh_timer.isActive()
+        panel.show()
+        assert panel.refresh_timer.isActive()
+        panel.reject()
+        assert not panel.refresh_timer.isActive()
+    finally:
+        panel.deleteLater()
@@ -0,0 +1,142 @@
+import json
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+import hava_durumu as H
+
+class FakeWeatherServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, script=(), latency=0.0):
+        self.script = list(script)
+        self.latency = latency
+        self.hits = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", 0), FakeWeatherHandler)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/data/2.5/weather"
+
+class FakeWeatherHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            status, headers = server.script.pop(0) if server.script else (200, {})
+        try:
+            time.sleep(server.latency)
+            body = json.dumps({"name": "Ankara", "status": status}).encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(script=(), latency=0.0):
+        server = FakeWeatherServer(script, latency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def client(**kwargs):
+    kwargs.setdefault("backoff_base", 0.01)
+    kwargs.setdefault("backoff_cap", 0.05)
+    return H.WeatherClient(**kwargs)
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_transient_statuses_are_retried(fake_server):
+    server = fake_server([(503, {}), (429, {}), (502, {})])
+    weather = client(max_retries=3)
+    response = weather.get(server.url)
+    assert response.status_code == 200
+    assert server.hits == 4
+    assert weather.retries == 3
+
+def test_retries_stop_at_the_limit(fake_server):
+    server = fake_server([(500, {})] * 10)
+    weather = client(max_retries=2)
+    assert weather.get(server.url).status_code == 500
+    assert server.hits == 3
+    assert weather.retries == 2
+
+def test_client_errors_are_not_retried(fake_server):
+    server = fake_server([(404, {})])
+    weather = client()
+    assert weather.get(server.url).status_code == 404
+    assert server.hits == 1
+
+def test_retry_after_is_honoured_up_to_the_cap(fake_server):
+    server = fake_server([(429, {"Retry-After": "120"})])
+    weather = client(backoff_cap=0.3)
+    started = time.perf_counter()
+    assert weather.get(server.url).status_code == 200
+    elapsed = time.perf_counter() - started
+    assert 0.3 <= elapsed < 2
+    assert weather._backoff_delay(0, "1") == 0.3
+    assert weather._backoff_delay(0, "0.1") <= 0.01
+
+def test_backoff_is_jittered_and_capped():
+    weather = client(backoff_base=0.5, backoff_cap=2.0)
+    delays = [weather._backoff_delay(attempt) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= delay <= 2.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+def test_refused_connections_are_retried_then_raised():
+    weather = client(max_retries=2)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        weather.get(f"http://127.0.0.1:{closed_port()}/data/2.5/weather")
+    assert weather.retries == 2
+
+def test_slow_responses_time_out(fake_server):
+    server = fake_server(latency=1.0)
+    with pytest.raises(requests.exceptions.Timeout):
+        client(max_retries=0).get(server.url, timeout=0.2)
+
+def test_concurrency_is_limited_per_host(fake_server):
+    server = fake_server(latency=0.2)
+    weather = client(per_host_limit=2, pool_size=8)
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        statuses = list(pool.map(lambda _: weather.get(server.url).status_code, range(6)))
+    assert statuses == [200] * 6
+    assert server.max_active == 2
+
+def test_hosts_have_separate_limits(fake_server):
+    first, second = fake_server(latency=0.3), fake_server(latency=0.3)
+    weather = client(per_host_limit=1)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda server: weather.get(server.url), (first, second)))
+    assert time.perf_counter() - started < 0.55
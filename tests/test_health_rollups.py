@@ -0,0 +1,26 @@
+import threading
+
+import veritabani as V
+
+def test_writes_during_a_rebuild_are_not_lost(database, monkeypatch):
+    V.init_db()
+    V.add_user("a", "pw", "", "")
+    for day in range(1, 10):
+        V.update_health_log(1, f"2024-02-{day:02d}", 1000, 1.0, 7.0)
+    aggregate = V._aggregate_health_rollups_in_parallel
+    writer = threading.Thread(target=V.releases_connection(V.update_health_log),
+                              args=(1, "2024-02-10", 3000, 2.0, 8.0))
+
+    def aggregate_then_write(*args):
+        aggregated = aggregate(*args)
+        if writer.ident is None:
+            writer.start()
+            writer.join(0.3)
+        return aggregated
+
+    monkeypatch.setattr(V, "_aggregate_health_rollups_in_parallel", aggregate_then_write)
+    V.rebuild_health_rollups(workers=2, chunk_size=1)
+    writer.join()
+
+    assert V.check_health_rollups(workers=1) == []
+    assert V.get_health_rollups(1, "monthly")[0][:3] == ("2024-02", 10, 12000)
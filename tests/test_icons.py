@@ -0,0 +1,34 @@
+import json
+import struct
+
+import pytest
+
+pytest.importorskip("PyQt5")
+K = pytest.importorskip("kişiselAsistanım")
+
+@pytest.fixture
+def bundle_path(tmp_path):
+    icon = tmp_path / "app.png"
+    icon.write_bytes(b"\x89PNG" + b"x" * 60)
+    path = tmp_path / "icons.pack"
+    assert K.pack_icons({"app_icon": str(icon)}, str(path)) == 1
+    return path
+
+def test_packed_icons_are_read_back(bundle_path):
+    bundle = K.IconBundle(str(bundle_path))
+    assert bundle.data("app_icon") == b"\x89PNG" + b"x" * 60
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:len(K.ICON_BUNDLE_MAGIC) + 2],
+    lambda data: data[:len(K.ICON_BUNDLE_MAGIC) + 10],
+    lambda data: data[:-10],
+    lambda data: K.ICON_BUNDLE_MAGIC + struct.pack("<I", 4) + b"\xff\xfe{}" + data,
+    lambda data: K.ICON_BUNDLE_MAGIC + struct.pack("<I", 2) + b"[]",
+    lambda data: K.ICON_BUNDLE_MAGIC + struct.pack("<I", 18) + json.dumps({"a": [0, "x"]}).encode()[:18],
+    lambda data: b"NOTICONS" + data[8:],
+])
+def test_corrupt_bundles_fall_back_to_loose_files(bundle_path, corrupt):
+    bundle_path.write_bytes(corrupt(bundle_path.read_bytes()))
+    bundle = K.IconBundle(str(bundle_path))
+    assert bundle.index == {}
+    assert bundle.data("app_icon") is None
@@ -0,0 +1,37 @@
+import os
+import sys
+import json
+import subprocess
+
+from conftest import ROOT
+
+DATA_LAYER_MODULES = ("veritabani", "komut_satiri")
+HEAVY_MODULES = ("PyQt5", "requests", "numpy")
+IMPORT_BUDGET_US = 120_000
+CHECK = ("import sys, json\n"
+         f"import {', '.join(DATA_LAYER_MODULES)}\n"
+         f"print(json.dumps(sorted({{name.split('.')[0] for name in sys.modules}} & set({HEAVY_MODULES!r}))))")
+
+def import_profile(workdir, pycache):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    result = subprocess.run([sys.executable, "-X", f"pycache_prefix={pycache}", "-X", "importtime", "-c", CHECK],
+                            cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) == 3 and fields[1].strip().isdigit() and not fields[2].startswith("  "):
+            cumulative[fields[2].strip()] = int(fields[1])
+    return json.loads(result.stdout), cumulative
+
+def test_data_layer_imports_without_gui_or_network_stack(tmp_path):
+    heavy, cumulative = import_profile(tmp_path, tmp_path / "pycache")
+    assert heavy == []
+    assert set(DATA_LAYER_MODULES) <= set(cumulative)
+    assert [path.name for path in tmp_path.iterdir()] == ["pycache"], "importing must not create the database"
+
+def test_data_layer_import_time_stays_within_budget(tmp_path):
+    import_profile(tmp_path, tmp_path / "pycache")
+    best = min(sum(import_profile(tmp_path, tmp_path / "pycache")[1][name] for name in DATA_LAYER_MODULES)
+               for _ in range(3))
+    assert best < IMPORT_BUDGET_US, f"veritabani + komut_satiri took {best / 1000:.1f} ms to import"
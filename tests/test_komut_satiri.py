@@ -0,0 +1,35 @@
+import io
+import shutil
+
+import veritabani as V
+import komut_satiri as K
+from conftest import SHIPPED_DATABASE
+
+def run(argv, monkeypatch, stdin=""):
+    monkeypatch.setattr("sys.stdin", io.StringIO(stdin))
+    return K.main(argv + ["--user", "cli", "--password", "pw"])
+
+def test_commands_migrate_an_existing_database(database, monkeypatch, capsys):
+    shutil.copyfile(SHIPPED_DATABASE, database)
+    with V.get_db().transaction() as cursor:
+        cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", ("cli", V.hash_password("pw")))
+
+    assert run(["add", "Işık açıktı", "--title", "Akşam"], monkeypatch) == 0
+    assert V.get_schema_version() == V.SCHEMA_VERSION
+    capsys.readouterr()
+    assert run(["search", "isik"], monkeypatch) == 0
+    assert "[Işık] açıktı" in capsys.readouterr().out
+
+def test_log_health_keeps_fields_not_given(database, monkeypatch):
+    V.init_db()
+    V.add_user("cli", "pw", "", "")
+    assert run(["log-health", "--date", "2026-10-01", "--water", "1500"], monkeypatch) == 0
+    assert run(["log-health", "--date", "2026-10-01", "--sleep", "7.5"], monkeypatch) == 0
+    assert V.get_health_log(1, "2026-10-01") == (1500, 0.0, 7.5)
+
+def test_database_errors_are_reported(database, monkeypatch, capsys):
+    V.init_db()
+    V.add_user("cli", "pw", "", "")
+    V.get_db().execute("DROP TABLE diary_fts")
+    assert run(["search", "isik"], monkeypatch) == 1
+    assert "Veritabanı hatası" in capsys.readouterr().err
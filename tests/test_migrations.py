@@ -0,0 +1,67 @@
+import shutil
+
+import veritabani as V
+from conftest import SHIPPED_DATABASE
+
+def test_new_database_is_fully_migrated(database):
+    assert V.init_db() == []
+    assert V.get_schema_version() == V.SCHEMA_VERSION
+
+def test_online_step_blocks_later_migrations_until_run(database):
+    shutil.copyfile(SHIPPED_DATABASE, database)
+    version = V.get_schema_version()
+    online = [number for number, migration, is_online in V.MIGRATIONS if is_online and number > version]
+    assert online, "shipped database is expected to predate an online migration"
+
+    pending = V.init_db()
+    assert pending == list(range(online[0], V.SCHEMA_VERSION + 1))
+    assert V.get_schema_version() == online[0] - 1
+
+    assert V.run_migrations() == V.SCHEMA_VERSION
+    assert V.init_db() == []
+    user_id = V.get_db().execute("SELECT id FROM users LIMIT 1").fetchone()
+    if user_id:
+        V.load_user_preferences(user_id[0])
+        V.search_diary_entries(user_id[0], "a")
+        V.get_diary_version(user_id[0])
+
+def test_health_edits_during_rollup_backfill_are_counted_once(database):
+    V.init_db()
+    V.add_user("a", "pw", "", "")
+    for day in range(1, 29):
+        V.update_health_log(1, f"2024-02-{day:02d}", 1000, 1.0, 7.0)
+    backfill = V._migration_005_health_rollups(V.get_db(), 5)
+    next(backfill)
+    V.update_health_log(1, "2024-02-27", 2000, 2.0, 8.0)
+    with V.get_db().transaction() as cursor:
+        cursor.execute("DELETE FROM health_data WHERE user_id = 1 AND log_date = '2024-02-28'")
+    V.update_health_log(1, "2024-03-01", 500, 0.5, 6.0)
+    for _ in backfill:
+        pass
+    assert V.check_health_rollups(workers=1) == []
+    assert V.get_db().execute("SELECT COUNT(*) FROM migration_backfills").fetchone()[0] == 0
+
+def fts_total_rows(db):
+    block = db.execute("SELECT block FROM diary_fts_data WHERE id = 1").fetchone()[0]
+    value = 0
+    for byte in block:
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value
+
+def test_diary_edits_during_search_backfill_keep_the_index_consistent(database):
+    V.init_db()
+    V.add_user("a", "pw", "", "")
+    ids = [V.add_diary_entry(1, f"başlık {i}", f"eski içerik {i}", None, False) for i in range(20)]
+    backfill = V._migration_003_diary_search_index(V.get_db(), 5)
+    next(backfill)
+    with V.get_db().transaction() as cursor:
+        cursor.execute("UPDATE diary_entries SET content = 'yeni kayıt' WHERE id = ?", (ids[10],))
+        cursor.execute("DELETE FROM diary_entries WHERE id = ?", (ids[15],))
+    for _ in backfill:
+        pass
+    with V.get_db().transaction() as cursor:
+        cursor.execute("INSERT INTO diary_fts (diary_fts) VALUES ('integrity-check')")
+    assert fts_total_rows(V.get_db()) == 19
+    assert [row[0] for row in V.search_diary_entries(1, "yeni")] == [ids[10]]
+    assert len(V.search_diary_entries(1, "eski", limit=100)) == 18
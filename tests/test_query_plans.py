@@ -0,0 +1,111 @@
+import io
+import re
+import time
+import datetime
+
+import veritabani as V
+
+DML = re.compile(r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+FTS_MATCH = re.compile(r"^SCAN \S+ VIRTUAL TABLE INDEX \d+:\S*M")
+
+HOT_QUERIES = {
+    "check_user": (V.USER_LOGIN_SQL, ("kullanici",)),
+    "load_user_preferences": (f"SELECT {', '.join(V.PREFERENCE_KEYS)} FROM user_preferences WHERE user_id = ?", (1,)),
+    "get_diary_entries": (V.DIARY_LIST_SQL, (1,)),
+    "get_diary_entries_page": (V.DIARY_FIRST_PAGE_SQL, (1, V.DIARY_PAGE_SIZE)),
+    "get_diary_entries_page_next": (V.DIARY_NEXT_PAGE_SQL, (1, "2024-01-01 00:00:00", 1, V.DIARY_PAGE_SIZE)),
+    "get_diary_entry_by_id": (V.DIARY_ENTRY_SQL, (1,)),
+    "get_health_log": (V.HEALTH_LOG_SQL, (1, "2024-01-01")),
+    "get_health_logs_between": (V.HEALTH_RANGE_SQL, (1, "2024-01-01", "2024-01-31")),
+    "search_diary_entries": (V.DIARY_SEARCH_SQL, ("<b>", "</b>", '"isik"*', 1, V.DIARY_PAGE_SIZE, 0)),
+    "export_diary_entries": (V.DIARY_EXPORT_SQL, (1,)),
+    "export_health_logs": (V.HEALTH_EXPORT_SQL, (1,)),
+    "get_saved_cities": (V.SAVED_CITIES_SQL, (1,)),
+}
+
+# Sorts that are expected: bm25 ranking, a user's few saved cities and the (at most two) forecast slots around now.
+ALLOWED_SORTS = [re.compile(re.escape(sql).replace(r"\?", ".+?"), re.DOTALL)
+                 for sql in (V.DIARY_SEARCH_SQL, V.SAVED_CITIES_SQL, V.FORECAST_NEAREST_SQL)]
+
+def is_slow_step(detail, sort_allowed):
+    # Only SEARCH steps use an index to narrow the rows; any SCAN, including a covering-index scan, reads everything.
+    if detail.startswith("SCAN "):
+        return not FTS_MATCH.match(detail) and detail != "SCAN CONSTANT ROW"
+    return "TEMP B-TREE" in detail and not sort_allowed
+
+def find_slow_query_plans(queries):
+    slow_plans = {}
+    for name, (sql, params) in queries.items():
+        plan = V.get_db().execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        sort_allowed = any(pattern.fullmatch(sql) for pattern in ALLOWED_SORTS)
+        bad_steps = [row[-1] for row in plan if is_slow_step(row[-1], sort_allowed)]
+        if bad_steps:
+            slow_plans[name] = bad_steps
+    return slow_plans
+
+def forecast_payload(now):
+    return {"city": {"name": "Ankara", "country": "TR"},
+            "list": [{"dt": int(now) + hours * 3600, "pop": 0.2, "wind": {"speed": 3.0},
+                      "main": {"temp": 10.0, "feels_like": 9.0, "humidity": 60},
+                      "weather": [{"main": "Clear", "description": "açık", "icon": "01d"}]} for hours in range(0, 24, 3)]}
+
+def exercise_data_layer():
+    V.add_user("a", "pw", "A", "B")
+    user_id = V.check_user("a", "pw")["id"]
+    preferences = V.load_user_preferences(user_id)
+    preferences.city = "Ankara"
+    V._loaded_preferences.clear()
+    V.get_user_preference(user_id, "city")
+
+    entry_id = V.add_diary_entry(user_id, "Başlık", "ışık içerik", "Mutlu 😊", True)
+    V.get_diary_entries(user_id)
+    page = V.get_diary_entries_page(user_id)
+    V.get_diary_entries_page(user_id, after=(page[-1][1], page[-1][0]))
+    V.search_diary_entries(user_id, "isik")
+    V.get_diary_entry_summary(entry_id)
+    V.get_diary_version(user_id)
+    V.get_diary_entry_by_id(entry_id)
+
+    V.update_health_log(user_id, "2024-01-01", 1500, 2.0, 7.5)
+    V.get_health_log(user_id, "2024-01-01")
+    V.HealthMonthCache(user_id).get_day("2024-01-01")
+    V.load_health_series(user_id, datetime.date(2023, 12, 1), datetime.date(2024, 1, 31))
+    for period in V.HEALTH_ROLLUP_PERIODS:
+        V.get_health_rollups(user_id, period)
+
+    V.export_diary_entries(user_id, io.StringIO())
+    V.export_health_logs(user_id, io.StringIO())
+    V.import_diary_entries(user_id, io.StringIO('{"content": "içe aktarılan"}\n'))
+    V.import_health_logs(user_id, io.StringIO('{"log_date": "2024-01-02", "water_ml": 500}\n'))
+
+    now = time.time()
+    V.weather_cache.put("Ankara", {"name": "Ankara"})
+    V.weather_cache.get("Ankara")
+    V.forecast_store.put("Ankara", forecast_payload(now))
+    V.forecast_store.is_fresh("Ankara")
+    V.forecast_store.current("Ankara", at=now + 3600)
+    V.forecast_store.upcoming("Ankara")
+    V.add_saved_city(user_id, "Ankara")
+    V.set_saved_city_ids(user_id, {"Ankara": 323786})
+    V.get_saved_cities(user_id)
+    V.remove_saved_city(user_id, "Ankara")
+    V.save_weather_icon_bytes("01d", b"png")
+    V.get_weather_icon_bytes("01d")
+    V.delete_diary_entry(entry_id)
+
+def test_hot_queries_use_indexes(database):
+    V.init_db()
+    assert find_slow_query_plans(HOT_QUERIES) == {}
+
+def test_every_statement_uses_indexes(database):
+    V.init_db()
+    statements = []
+    V.get_db().connection().set_trace_callback(statements.append)
+    try:
+        exercise_data_layer()
+    finally:
+        V.get_db().connection().set_trace_callback(None)
+    # FTS5 reads its own shadow tables through fully qualified 'main'.'…' names; those are not ours to index.
+    queries = {sql: (sql, ()) for sql in dict.fromkeys(statements) if DML.match(sql) and "'main'." not in sql}
+    assert len(queries) > 30
+    assert find_slow_query_plans(queries) == {}
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+
+import veritabani as V
+import komut_satiri as K
+
+def test_progress_is_reported_once_per_batch(database, monkeypatch):
+    V.init_db()
+    V.add_user("a", "pw", "", "")
+    calls = []
+    records = "".join(f'{{"log_date": "2024-01-{day:02d}", "water_ml": 500}}\n' for day in range(1, 5))
+    assert V.import_health_logs(1, io.StringIO(records), progress_callback=lambda *a: calls.append(a), batch_size=2) == 4
+    assert calls == [(2, None), (4, None)]
+
+    monkeypatch.setattr(V, "TRANSFER_BATCH_SIZE", 2)
+    calls.clear()
+    assert V.export_health_logs(1, io.StringIO(), progress_callback=lambda *a: calls.append(a)) == 4
+    assert calls == [(2, 4), (4, 4)]
+
+    calls.clear()
+    V.import_health_logs(1, io.StringIO(""), progress_callback=lambda *a: calls.append(a))
+    assert calls == [(0, None)]
+
+@pytest.mark.parametrize("importer, record", [
+    (V.import_health_logs, '{"log_date": "2024-13-01"}'),
+    (V.import_health_logs, '{"log_date": "01.02.2024"}'),
+    (V.import_diary_entries, '{"content": "x", "entry_date": "2024-02-30 10:00:00"}'),
+    (V.import_diary_entries, '{"content": "x", "entry_date": "dün"}'),
+])
+def test_malformed_dates_are_rejected_with_the_record_number(database, importer, record):
+    V.init_db()
+    V.add_user("a", "pw", "", "")
+    valid = ('{"log_date": "2024-01-01"}' if importer is V.import_health_logs
+             else '{"content": "x", "entry_date": "2024-01-01 10:00:00"}')
+    with pytest.raises(ValueError, match="^2. kayıtta geçersiz tarih"):
+        importer(1, io.StringIO(f"{valid}\n{record}\n"))
+
+def test_cli_reports_a_malformed_import_date(database, monkeypatch, capsys):
+    V.init_db()
+    V.add_user("cli", "pw", "", "")
+    monkeypatch.setattr("sys.stdin", io.StringIO('{"log_date": "2024-1-1x"}\n'))
+    assert K.main(["import", "health", "-", "--user", "cli", "--password", "pw"]) == 1
+    assert "1. kayıtta geçersiz tarih: '2024-1-1x'" in capsys.readouterr().err
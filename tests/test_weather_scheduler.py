@@ -0,0 +1,91 @@
+import os
+import json
+import datetime
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+import veritabani as V
+K = pytest.importorskip("kişiselAsistanım")
+
+class FakePreferences:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+    def get(self, key, default=None):
+        return self.__dict__.get(key, default)
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+def at(hour, minute=0, day=1):
+    return datetime.datetime(2024, 3, day, hour, minute).timestamp()
+
+def scheduler(qapp, open_minutes=()):
+    return K.WeatherRefreshScheduler(FakePreferences(weather_open_minutes=json.dumps(list(open_minutes))))
+
+def test_errors_back_off_exponentially_up_to_the_maximum(qapp):
+    s = scheduler(qapp)
+    s.tab_visible = True
+    delays = []
+    for _ in range(8):
+        s.errors += 1
+        delays.append(s.next_delay(now=at(12)))
+    assert delays == [60, 120, 240, 480, 960, 1920, 3600, 3600]
+    s.note_result({"dt": at(12)}, at(12))
+    assert s.errors == 0
+
+def test_delay_is_clamped_between_the_min_and_max_interval(qapp):
+    s = scheduler(qapp)
+    s.tab_visible = True
+    assert s.next_delay(now=at(12)) is None
+    s.fetched_at, s.observed_at = at(12), at(11, 55)
+    assert s.next_delay(now=at(12)) == max(V.WEATHER_CACHE_TTL, 5 * 60)
+    s.fetched_at = s.observed_at = at(8)
+    assert s.next_delay(now=at(12)) == K.WEATHER_REFRESH_MIN_INTERVAL
+    s.fetched_at, s.observed_at = at(12), at(18)
+    assert s.next_delay(now=at(12)) == K.WEATHER_REFRESH_MAX_INTERVAL
+
+def test_timer_stops_while_paused_and_restarts_on_resume(qapp):
+    s = scheduler(qapp)
+    s.note_result({}, at(12))
+    s.set_tab_visible(True)
+    assert s.timer.isActive()
+    s.pause()
+    assert not s.timer.isActive()
+    s.note_error()
+    assert not s.timer.isActive()
+    s.resume()
+    assert s.timer.isActive()
+
+def test_hidden_tab_only_wakes_up_for_a_habitual_prefetch(qapp):
+    s = scheduler(qapp)
+    s.note_result({}, at(12))
+    assert s.next_delay(now=at(12)) is None
+    s.set_tab_visible(False)
+    assert not s.timer.isActive()
+
+def test_prefetch_runs_the_lead_time_before_a_habitual_open(qapp):
+    s = scheduler(qapp, open_minutes=[8 * 60, 8 * 60 + 5, 8 * 60 + 10, 20 * 60])
+    assert s.next_prefetch_time(at(7)) == at(8) - K.WEATHER_PREFETCH_LEAD
+    assert s.next_delay(now=at(7)) == 3600 - K.WEATHER_PREFETCH_LEAD
+    assert s.next_prefetch_time(at(9)) == at(8, day=2) - K.WEATHER_PREFETCH_LEAD
+    s.fetched_at = at(8) - V.WEATHER_CACHE_TTL + 1
+    assert s.next_prefetch_time(at(7, 30)) == at(8, 5) - K.WEATHER_PREFETCH_LEAD
+
+def test_isolated_opens_do_not_schedule_a_prefetch(qapp):
+    assert scheduler(qapp, open_minutes=[8 * 60]).next_prefetch_time(at(7)) is None
+    assert scheduler(qapp, open_minutes=[8 * 60, 14 * 60]).next_prefetch_time(at(7)) is None
+
+def test_usage_history_is_persisted(qapp, database):
+    V.init_db()
+    V.add_user("a", "pw", "", "")
+    s = K.WeatherRefreshScheduler(V.load_user_preferences(1))
+    s.set_tab_visible(True)
+    V._loaded_preferences.clear()
+    assert json.loads(V.load_user_preferences(1).weather_open_minutes) == s.open_minutes != []
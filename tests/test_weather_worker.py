@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("requests")
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+import veritabani as V
+import hava_durumu as H
+K = pytest.importorskip("kişiselAsistanım")
+
+SLOW_RESPONSE = 0.8
+
+class SlowWeatherHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        city = parse_qs(url.query).get("q", ["?"])[0]
+        if url.path.endswith("/weather"):
+            time.sleep(SLOW_RESPONSE if city != "Hızlı" else 0.0)
+            body = {"name": city, "sys": {"country": "TR"}, "wind": {"speed": 2.0},
+                    "main": {"temp": 21.5, "feels_like": 21.0, "humidity": 40},
+                    "weather": [{"main": "Clear", "description": "açık", "icon": "01d"}]}
+        elif url.path.endswith("/forecast"):
+            body = {"city": {"name": city, "country": "TR"}, "list": []}
+        else:
+            self.send_error(404)
+            return
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+@pytest.fixture
+def weather_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowWeatherHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(H, "WEATHER_BASE_URL", f"{base}/data/2.5/weather?")
+    monkeypatch.setattr(H, "WEATHER_FORECAST_URL", f"{base}/data/2.5/forecast?")
+    monkeypatch.setattr(H, "WEATHER_ICON_URL", base + "/img/{icon_code}.png")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def run_until(condition, timeout=5.0):
+    loop = QEventLoop()
+    poll = QTimer()
+    poll.timeout.connect(lambda: condition() and loop.quit())
+    poll.start(5)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    loop.exec_()
+    poll.stop()
+    return condition()
+
+def test_event_loop_stays_responsive_during_a_slow_fetch(qapp, database, weather_server):
+    V.init_db()
+    results = []
+    task = K.WeatherFetchTask(1, "Ankara", "anahtar")
+    task.signals.finished.connect(lambda request_id, data, icon: results.append(data))
+    task.signals.failed.connect(lambda *args: results.append(args))
+
+    ticks = []
+    heartbeat = QTimer()
+    heartbeat.timeout.connect(lambda: ticks.append(time.perf_counter()))
+    heartbeat.start(10)
+    started = time.perf_counter()
+    K.QThreadPool.globalInstance().start(task)
+    assert time.perf_counter() - started < 0.05
+    assert run_until(lambda: results)
+    heartbeat.stop()
+
+    assert results[0]["name"] == "Ankara"
+    assert ticks[-1] - started >= SLOW_RESPONSE
+    gaps = [later - earlier for earlier, later in zip(ticks, ticks[1:])]
+    assert len(ticks) > SLOW_RESPONSE / 0.02
+    assert max(gaps) < 0.1
+
+def test_stale_requests_are_dropped_when_the_city_changes(qapp, database, weather_server):
+    V.init_db()
+    V.add_user("hava", "pw", "", "")
+    user = V.check_user("hava", "pw")
+    V.save_user_preference(user["id"], "api_key", "anahtar")
+    window = K.App(user)
+    try:
+        window.ensure_tab_built(window.tab_hava_durumu)
+        window.get_weather("Yavaş")
+        window.get_weather("Hızlı")
+        assert run_until(lambda: "Hızlı" in window.city_name_label.text())
+        assert not run_until(lambda: "Yavaş" in window.city_name_label.text(), timeout=SLOW_RESPONSE + 0.5)
+    finally:
+        window.weather_thread_pool.waitForDone(5000)
+        window.close()
+        window.deleteLater()
@@ -0,0 +1,1128 @@
+import sqlite3
+import hashlib
+import datetime
+import time
+import threading
+import json
+import csv
+import array
+import math
+import calendar
+from collections import OrderedDict
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from olcumler import timed
+
+np = None
+_numpy_loaded = False
+
+def _load_numpy():
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            np = None
+    return np
+
+DATABASE_NAME = 'personal_diary_app_v2.db'
+WEATHER_UNITS = "metric"
+WEATHER_LANG = "tr"
+WEATHER_CACHE_TTL = 600
+WEATHER_CACHE_STALE_TTL = 6 * 3600
+WEATHER_FORECAST_TTL = 3 * 3600
+WEATHER_FORECAST_STEP = 3 * 3600
+WEATHER_FORECAST_PREVIEW = 4
+DB_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "mmap_size": 134217728,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+}
+DB_STATEMENT_CACHE_SIZE = 256
+DIARY_PAGE_SIZE = 200
+DIARY_SEARCH_TOKENIZER = "unicode61 remove_diacritics 2"
+MIGRATION_BATCH_SIZE = 5000
+TRANSFER_BATCH_SIZE = 10000
+TRANSFER_FORMATS = ("jsonl", "csv")
+DIARY_TRANSFER_FIELDS = ["entry_date", "title", "content", "mood", "is_important"]
+HEALTH_TRANSFER_FIELDS = ["log_date", "water_ml", "exercise_km", "sleep_hours"]
+HEALTH_METRICS = ("water_ml", "exercise_km", "sleep_hours")
+HEALTH_ROLLING_WINDOW = 7
+HEALTH_PERCENTILES = (10, 50, 90)
+HEALTH_ROLLUP_PERIODS = {
+    "weekly": ("health_rollups_weekly", "date({0}, '-6 days', 'weekday 1')"),
+    "monthly": ("health_rollups_monthly", "strftime('%Y-%m', {0})"),
+}
+HEALTH_ROLLUP_WORKERS = 4
+HEALTH_CACHE_MONTHS = 12
+HEALTH_ROLLUP_CHUNK_SIZE = 50
+HEALTH_UPSERT_SQL = ("INSERT INTO health_data (user_id, log_date, water_ml, exercise_km, sleep_hours) VALUES (?, ?, ?, ?, ?) "
+                     "ON CONFLICT (user_id, log_date) DO UPDATE SET water_ml = excluded.water_ml, "
+                     "exercise_km = excluded.exercise_km, sleep_hours = excluded.sleep_hours")
+
+def hash_password(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+USER_LOGIN_SQL = "SELECT id, password_hash, name, surname FROM users WHERE username = ?"
+DIARY_LIST_SQL = ("SELECT id, entry_date, title, mood, is_important, SUBSTR(content, 1, 50) FROM diary_entries "
+                  "WHERE user_id = ? ORDER BY entry_date DESC")
+DIARY_PAGE_COLUMNS = "id, entry_date, title, mood, is_important, SUBSTR(content, 1, 50)"
+DIARY_FIRST_PAGE_SQL = (f"SELECT {DIARY_PAGE_COLUMNS} FROM diary_entries "
+                        "WHERE user_id = ? ORDER BY entry_date DESC, id DESC LIMIT ?")
+DIARY_NEXT_PAGE_SQL = (f"SELECT {DIARY_PAGE_COLUMNS} FROM diary_entries "
+                       "WHERE user_id = ? AND (entry_date, id) < (?, ?) ORDER BY entry_date DESC, id DESC LIMIT ?")
+DIARY_SUMMARY_SQL = f"SELECT {DIARY_PAGE_COLUMNS} FROM diary_entries WHERE id = ?"
+DIARY_ENTRY_SQL = "SELECT title, content, mood, is_important FROM diary_entries WHERE id = ?"
+HEALTH_LOG_SQL = "SELECT water_ml, exercise_km, sleep_hours FROM health_data WHERE user_id = ? AND log_date = ?"
+HEALTH_RANGE_SQL = ("SELECT log_date, water_ml, exercise_km, sleep_hours FROM health_data "
+                    "WHERE user_id = ? AND log_date BETWEEN ? AND ? ORDER BY log_date")
+
+DIARY_SEARCH_SQL = ("SELECT d.id, d.entry_date, d.title, d.mood, d.is_important, snippet(diary_fts, -1, ?, ?, '…', 12) "
+                    "FROM diary_fts JOIN diary_entries d ON d.id = diary_fts.rowid "
+                    "WHERE diary_fts MATCH ? AND d.user_id = ? ORDER BY bm25(diary_fts, 10.0, 1.0) LIMIT ? OFFSET ?")
+DIARY_EXPORT_SQL = ("SELECT entry_date, title, content, mood, is_important FROM diary_entries "
+                    "WHERE user_id = ? ORDER BY entry_date, id")
+HEALTH_EXPORT_SQL = ("SELECT log_date, water_ml, exercise_km, sleep_hours FROM health_data "
+                     "WHERE user_id = ? ORDER BY log_date")
+SAVED_CITIES_SQL = "SELECT city, city_id FROM saved_cities WHERE user_id = ? ORDER BY position, city"
+
+class ConnectionManager:
+    def __init__(self, database, pragmas=None, statement_cache_size=DB_STATEMENT_CACHE_SIZE):
+        self.database = database
+        self.pragmas = dict(DB_PRAGMAS if pragmas is None else pragmas)
+        self.statement_cache_size = statement_cache_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def _open(self):
+        conn = sqlite3.connect(self.database, cached_statements=self.statement_cache_size, check_same_thread=False)
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def release(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+
+    def open_connections(self):
+        with self._lock:
+            return len(self._connections)
+
+    def execute(self, sql, params=()):
+        return self.connection().execute(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connection()
+        cursor = conn.cursor()
+        if conn.in_transaction:
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    def close_all(self):
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+_db_manager = None
+
+def get_db():
+    global _db_manager
+    if _db_manager is None or _db_manager.database != DATABASE_NAME:
+        if _db_manager is not None:
+            _db_manager.close_all()
+        _db_manager = ConnectionManager(DATABASE_NAME)
+    return _db_manager
+
+def releases_connection(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            get_db().release()
+    return wrapper
+
+def _migration_001_base_schema(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        password_hash TEXT NOT NULL,
+        name TEXT,
+        surname TEXT
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS diary_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        entry_date TEXT NOT NULL,
+        title TEXT,
+        content TEXT NOT NULL,
+        mood TEXT,
+        is_important INTEGER DEFAULT 0,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS health_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        log_date TEXT NOT NULL,
+        water_ml INTEGER DEFAULT 0,
+        exercise_km REAL DEFAULT 0.0,
+        sleep_hours REAL DEFAULT 0.0,
+        UNIQUE(user_id, log_date),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_preferences (
+        user_id INTEGER PRIMARY KEY,
+        theme_color TEXT,
+        city TEXT,
+        api_key TEXT,
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    )
+    ''')
+    try:
+        cursor.execute("SELECT api_key FROM user_preferences LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute("ALTER TABLE user_preferences ADD COLUMN api_key TEXT")
+
+def _migration_002_lookup_indexes(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_diary_entries_user_date ON diary_entries (user_id, entry_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_health_data_user_date ON health_data (user_id, log_date, water_ml, exercise_km, sleep_hours)")
+
+def _begin_backfill(cursor, name, table):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS migration_backfills (
+        name TEXT PRIMARY KEY,
+        done_rowid INTEGER NOT NULL,
+        until_rowid INTEGER NOT NULL
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute(f"INSERT OR REPLACE INTO migration_backfills (name, done_rowid, until_rowid) "
+                   f"SELECT ?, 0, COALESCE(MAX(rowid), 0) FROM {table}", (name,))
+    cursor.execute("SELECT until_rowid FROM migration_backfills WHERE name = ?", (name,))
+    return cursor.fetchone()[0]
+
+def _backfilled_sql(name, row):
+    return (f"NOT EXISTS (SELECT 1 FROM migration_backfills WHERE name = '{name}' "
+            f"AND {row}.id > done_rowid AND {row}.id <= until_rowid)")
+
+def _migration_003_diary_search_index(db, batch_size):
+    with db.transaction() as cursor:
+        for trigger in ("diary_fts_ai", "diary_fts_ad", "diary_fts_au"):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute("DROP TABLE IF EXISTS diary_fts")
+        cursor.execute(f"""
+        CREATE VIRTUAL TABLE diary_fts USING fts5(
+            title, content, content='diary_entries', content_rowid='id', tokenize='{DIARY_SEARCH_TOKENIZER}'
+        )
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER diary_fts_ai AFTER INSERT ON diary_entries BEGIN
+            INSERT INTO diary_fts (rowid, title, content)
+            VALUES (new.id, {_fold_turkish_sql("new.title")}, {_fold_turkish_sql("new.content")});
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER diary_fts_ad AFTER DELETE ON diary_entries WHEN {_backfilled_sql("diary_fts", "old")} BEGIN
+            INSERT INTO diary_fts (diary_fts, rowid, title, content)
+            VALUES ('delete', old.id, {_fold_turkish_sql("old.title")}, {_fold_turkish_sql("old.content")});
+        END
+        """)
+        cursor.execute(f"""
+        CREATE TRIGGER diary_fts_au AFTER UPDATE OF title, content ON diary_entries WHEN {_backfilled_sql("diary_fts", "old")} BEGIN
+            INSERT INTO diary_fts (diary_fts, rowid, title, content)
+            VALUES ('delete', old.id, {_fold_turkish_sql("old.title")}, {_fold_turkish_sql("old.content")});
+            INSERT INTO diary_fts (rowid, title, content)
+            VALUES (new.id, {_fold_turkish_sql("new.title")}, {_fold_turkish_sql("new.content")});
+        END
+        """)
+        until_rowid = _begin_backfill(cursor, "diary_fts", "diary_entries")
+
+    def index_batch(cursor, first_rowid, last_rowid):
+        cursor.execute(f"""
+        INSERT INTO diary_fts (rowid, title, content)
+        SELECT id, {_fold_turkish_sql("title")}, {_fold_turkish_sql("content")} FROM diary_entries
+        WHERE id BETWEEN ? AND ?
+        """, (first_rowid, last_rowid))
+
+    yield from backfill_in_batches(db, "diary_entries", index_batch, batch_size, until_rowid, "diary_fts")
+
+def _migration_004_diary_versions(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS diary_versions (
+        user_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO diary_versions (user_id, version) SELECT DISTINCT user_id, 1 FROM diary_entries")
+    for trigger, event, row in (("diary_versions_ai", "INSERT", "new"), ("diary_versions_ad", "DELETE", "old"),
+                                ("diary_versions_au", "UPDATE", "new")):
+        cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {trigger} AFTER {event} ON diary_entries BEGIN
+            INSERT INTO diary_versions (user_id, version) VALUES ({row}.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1;
+        END
+        """)
+
+def _health_rollup_add_sql(table, period_sql, row):
+    period = period_sql.format(f"{row}.log_date")
+    return f"""
+            INSERT INTO {table} (user_id, period, days, water_ml_sum, exercise_km_sum, sleep_hours_sum)
+            VALUES ({row}.user_id, {period}, 1, COALESCE({row}.water_ml, 0), COALESCE({row}.exercise_km, 0), COALESCE({row}.sleep_hours, 0))
+            ON CONFLICT (user_id, period) DO UPDATE SET days = days + 1,
+                water_ml_sum = water_ml_sum + excluded.water_ml_sum,
+                exercise_km_sum = exercise_km_sum + excluded.exercise_km_sum,
+                sleep_hours_sum = sleep_hours_sum + excluded.sleep_hours_sum;"""
+
+def _health_rollup_remove_sql(table, period_sql, row):
+    period = period_sql.format(f"{row}.log_date")
+    return f"""
+            UPDATE {table} SET days = days - 1,
+                water_ml_sum = water_ml_sum - COALESCE({row}.water_ml, 0),
+                exercise_km_sum = exercise_km_sum - COALESCE({row}.exercise_km, 0),
+                sleep_hours_sum = sleep_hours_sum - COALESCE({row}.sleep_hours, 0)
+            WHERE user_id = {row}.user_id AND period = {period};
+            DELETE FROM {table} WHERE user_id = {row}.user_id AND period = {period} AND days <= 0;"""
+
+def _migration_005_health_rollups(db, batch_size):
+    with db.transaction() as cursor:
+        for table, period_sql in HEALTH_ROLLUP_PERIODS.values():
+            for event in ("ai", "ad", "au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {table}_{event}")
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(f'''
+            CREATE TABLE {table} (
+                user_id INTEGER NOT NULL,
+                period TEXT NOT NULL,
+                days INTEGER NOT NULL DEFAULT 0,
+                water_ml_sum INTEGER NOT NULL DEFAULT 0,
+                exercise_km_sum REAL NOT NULL DEFAULT 0.0,
+                sleep_hours_sum REAL NOT NULL DEFAULT 0.0,
+                PRIMARY KEY (user_id, period)
+            ) WITHOUT ROWID
+            ''')
+            add_new = _health_rollup_add_sql(table, period_sql, "new")
+            remove_old = _health_rollup_remove_sql(table, period_sql, "old")
+            backfilled = _backfilled_sql("health_rollups", "old")
+            cursor.execute(f"CREATE TRIGGER {table}_ai AFTER INSERT ON health_data BEGIN {add_new} END")
+            cursor.execute(f"CREATE TRIGGER {table}_ad AFTER DELETE ON health_data WHEN {backfilled} BEGIN {remove_old} END")
+            cursor.execute(f"CREATE TRIGGER {table}_au AFTER UPDATE ON health_data WHEN {backfilled} BEGIN {remove_old} {add_new} END")
+        until_rowid = _begin_backfill(cursor, "health_rollups", "health_data")
+
+    def rollup_batch(cursor, first_rowid, last_rowid):
+        for table, period_sql in HEALTH_ROLLUP_PERIODS.values():
+            cursor.execute(f"""
+            INSERT INTO {table} (user_id, period, days, water_ml_sum, exercise_km_sum, sleep_hours_sum)
+            SELECT user_id, {period_sql.format("log_date")}, COUNT(*), TOTAL(water_ml), TOTAL(exercise_km), TOTAL(sleep_hours)
+            FROM health_data WHERE id BETWEEN ? AND ? GROUP BY 1, 2
+            ON CONFLICT (user_id, period) DO UPDATE SET days = days + excluded.days,
+                water_ml_sum = water_ml_sum + excluded.water_ml_sum,
+                exercise_km_sum = exercise_km_sum + excluded.exercise_km_sum,
+                sleep_hours_sum = sleep_hours_sum + excluded.sleep_hours_sum
+            """, (first_rowid, last_rowid))
+
+    yield from backfill_in_batches(db, "health_data", rollup_batch, batch_size, until_rowid, "health_rollups")
+
+def _migration_006_weather_cache(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS weather_cache (
+        city TEXT NOT NULL,
+        units TEXT NOT NULL,
+        lang TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        payload TEXT NOT NULL,
+        PRIMARY KEY (city, units, lang)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_007_weather_icons(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS weather_icons (
+        icon_code TEXT PRIMARY KEY,
+        png BLOB NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_008_saved_cities(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS saved_cities (
+        user_id INTEGER NOT NULL,
+        city TEXT NOT NULL,
+        city_id INTEGER,
+        position INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, city),
+        FOREIGN KEY (user_id) REFERENCES users (id)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_009_weather_forecast(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS weather_forecast_sources (
+        city TEXT NOT NULL,
+        units TEXT NOT NULL,
+        lang TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        name TEXT NOT NULL,
+        country TEXT NOT NULL,
+        PRIMARY KEY (city, units, lang)
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS weather_forecast (
+        city TEXT NOT NULL,
+        units TEXT NOT NULL,
+        lang TEXT NOT NULL,
+        slot INTEGER NOT NULL,
+        temp REAL NOT NULL,
+        feels_like REAL NOT NULL,
+        humidity INTEGER NOT NULL,
+        wind_speed REAL NOT NULL,
+        pop REAL NOT NULL,
+        condition TEXT NOT NULL,
+        description TEXT NOT NULL,
+        icon TEXT NOT NULL,
+        PRIMARY KEY (city, units, lang, slot)
+    ) WITHOUT ROWID
+    ''')
+
+def _migration_010_weather_usage_preference(cursor):
+    cursor.execute("ALTER TABLE user_preferences ADD COLUMN weather_open_minutes TEXT")
+
+def _migration_011_theme_stylesheets(cursor):
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS theme_stylesheets (
+        cache_key TEXT PRIMARY KEY,
+        qss TEXT NOT NULL
+    ) WITHOUT ROWID
+    ''')
+
+MIGRATIONS = [
+    (1, _migration_001_base_schema, False),
+    (2, _migration_002_lookup_indexes, False),
+    (3, _migration_003_diary_search_index, True),
+    (4, _migration_004_diary_versions, False),
+    (5, _migration_005_health_rollups, True),
+    (6, _migration_006_weather_cache, False),
+    (7, _migration_007_weather_icons, False),
+    (8, _migration_008_saved_cities, False),
+    (9, _migration_009_weather_forecast, False),
+    (10, _migration_010_weather_usage_preference, False),
+    (11, _migration_011_theme_stylesheets, False),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def backfill_in_batches(db, table, apply_batch, batch_size=MIGRATION_BATCH_SIZE, until_rowid=None, name=None):
+    if until_rowid is None:
+        until_rowid = db.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+    total = db.execute(f"SELECT COUNT(*) FROM {table} WHERE rowid <= ?", (until_rowid,)).fetchone()[0]
+    last_rowid, done = 0, 0
+    while True:
+        with db.transaction() as cursor:
+            cursor.execute(f"SELECT rowid FROM {table} WHERE rowid > ? AND rowid <= ? ORDER BY rowid LIMIT ?",
+                           (last_rowid, until_rowid, batch_size))
+            rowids = [row[0] for row in cursor.fetchall()]
+            if not rowids:
+                break
+            apply_batch(cursor, rowids[0], rowids[-1])
+            if name:
+                cursor.execute("UPDATE migration_backfills SET done_rowid = ? WHERE name = ?", (rowids[-1], name))
+        last_rowid = rowids[-1]
+        done += len(rowids)
+        yield done, total
+    if name:
+        with db.transaction() as cursor:
+            cursor.execute("DELETE FROM migration_backfills WHERE name = ?", (name,))
+
+def get_schema_version():
+    return get_db().execute("PRAGMA user_version").fetchone()[0]
+
+def has_pending_migrations():
+    return get_schema_version() < SCHEMA_VERSION
+
+def pending_migrations():
+    version = get_schema_version()
+    return [number for number, migration, online in MIGRATIONS if number > version]
+
+@timed("db")
+def run_migrations(include_online=True, progress_callback=None, batch_size=MIGRATION_BATCH_SIZE):
+    db = get_db()
+    version = get_schema_version()
+    for number, migration, online in MIGRATIONS:
+        if number <= version:
+            continue
+        if online and not include_online:
+            # Migrations are strictly ordered by user_version, so everything after a deferred online step waits for it.
+            break
+        if online:
+            for done, total in migration(db, batch_size):
+                if progress_callback:
+                    progress_callback(number, done, total)
+            with db.transaction() as cursor:
+                cursor.execute(f"PRAGMA user_version = {number}")
+        else:
+            with db.transaction() as cursor:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+        version = number
+    return version
+
+def init_db():
+    version = get_schema_version()
+    if version >= SCHEMA_VERSION:
+        return []
+    is_new_database = version == 0 and not get_db().execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'diary_entries'").fetchone()
+    run_migrations(include_online=is_new_database)
+    return pending_migrations()
+
+@timed("db")
+def add_user(username, password, name, surname):
+    try:
+        with get_db().transaction() as cursor:
+            cursor.execute("INSERT INTO users (username, password_hash, name, surname) VALUES (?, ?, ?, ?)",
+                           (username, hash_password(password), name, surname))
+            user_id = cursor.lastrowid
+            if user_id:
+                cursor.execute("INSERT OR IGNORE INTO user_preferences (user_id, theme_color, city, api_key) VALUES (?, ?, ?, ?)",
+                               (user_id, "Mavi", "Istanbul", None))
+        return True
+    except sqlite3.IntegrityError:
+        return False
+
+@timed("db")
+def check_user(username, password):
+    user_record = get_db().execute(USER_LOGIN_SQL, (username,)).fetchone()
+    if user_record and user_record[1] == hash_password(password):
+        user_name = user_record[2] if user_record[2] is not None else ""
+        user_surname = user_record[3] if user_record[3] is not None else ""
+        return {"id": user_record[0], "name": user_name, "surname": user_surname, "username": username}
+    return None
+
+PREFERENCE_KEYS = ("theme_color", "city", "api_key", "weather_open_minutes")
+
+class UserPreferences:
+    def __init__(self, user_id):
+        self.__dict__["user_id"] = user_id
+        self.__dict__["_values"] = dict.fromkeys(PREFERENCE_KEYS)
+        self.__dict__["_listeners"] = []
+        row = get_db().execute(f"SELECT {', '.join(PREFERENCE_KEYS)} FROM user_preferences WHERE user_id = ?",
+                               (user_id,)).fetchone()
+        if row:
+            self._values.update(zip(PREFERENCE_KEYS, row))
+
+    def __getattr__(self, key):
+        if key not in PREFERENCE_KEYS:
+            raise AttributeError(key)
+        return self._values[key]
+
+    def __setattr__(self, key, value):
+        if key not in PREFERENCE_KEYS:
+            raise AttributeError(key)
+        save_user_preference(self.user_id, key, value)
+
+    def get(self, key, default=None):
+        value = self._values.get(key)
+        return default if value is None else value
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _changed(self, key, value):
+        if self._values.get(key) == value:
+            return
+        self._values[key] = value
+        for listener in list(self._listeners):
+            listener(key, value)
+
+_loaded_preferences = {}
+
+@timed("db")
+def load_user_preferences(user_id):
+    preferences = UserPreferences(user_id)
+    _loaded_preferences[user_id] = preferences
+    return preferences
+
+@timed("db")
+def save_user_preference(user_id, key, value):
+    if key not in PREFERENCE_KEYS:
+        return
+    with get_db().transaction() as cursor:
+        cursor.execute("INSERT OR IGNORE INTO user_preferences (user_id, theme_color, city, api_key) VALUES (?, ?, ?, ?)",
+                       (user_id, "Mavi", "Istanbul", None))
+        cursor.execute(f"UPDATE user_preferences SET {key} = ? WHERE user_id = ?", (value, user_id))
+    preferences = _loaded_preferences.get(user_id)
+    if preferences is not None:
+        preferences._changed(key, value)
+
+def get_user_preference(user_id, key):
+    if key not in PREFERENCE_KEYS:
+        return None
+    preferences = _loaded_preferences.get(user_id)
+    if preferences is not None:
+        return preferences.get(key)
+    try:
+        result = get_db().execute(f"SELECT {key} FROM user_preferences WHERE user_id = ?", (user_id,)).fetchone()
+        return result[0] if result else None
+    except sqlite3.OperationalError as e:
+        return None
+
+@timed("db")
+def add_diary_entry(user_id, title, content, mood, is_important):
+    entry_date = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with get_db().transaction() as cursor:
+        cursor.execute("INSERT INTO diary_entries (user_id, entry_date, title, content, mood, is_important) VALUES (?, ?, ?, ?, ?, ?)",
+                       (user_id, entry_date, title, content, mood, 1 if is_important else 0))
+        return cursor.lastrowid
+
+@timed("db")
+def get_diary_entries(user_id):
+    return get_db().execute(DIARY_LIST_SQL, (user_id,)).fetchall()
+
+@timed("db")
+def get_diary_entries_page(user_id, limit=DIARY_PAGE_SIZE, after=None):
+    if after is None:
+        return get_db().execute(DIARY_FIRST_PAGE_SQL, (user_id, limit)).fetchall()
+    after_date, after_id = after
+    return get_db().execute(DIARY_NEXT_PAGE_SQL, (user_id, after_date, after_id, limit)).fetchall()
+
+def _fold_turkish_sql(expression):
+    return f"REPLACE({expression}, 'ı', 'i')"
+
+def fold_turkish(text):
+    return text.replace("ı", "i").replace("İ", "i")
+
+def build_search_match(query):
+    terms = fold_turkish(query).split()
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+@timed("db")
+def search_diary_entries(user_id, query, limit=DIARY_PAGE_SIZE, offset=0, highlight=("<b>", "</b>")):
+    match = build_search_match(query)
+    if not match:
+        return []
+    return get_db().execute(DIARY_SEARCH_SQL, (highlight[0], highlight[1], match, user_id, limit, offset)).fetchall()
+
+@timed("db")
+def get_diary_entry_summary(entry_id):
+    return get_db().execute(DIARY_SUMMARY_SQL, (entry_id,)).fetchone()
+
+@timed("db")
+def get_diary_version(user_id):
+    result = get_db().execute("SELECT version FROM diary_versions WHERE user_id = ?", (user_id,)).fetchone()
+    return result[0] if result else 0
+
+@timed("db")
+def get_diary_entry_by_id(entry_id):
+    return get_db().execute(DIARY_ENTRY_SQL, (entry_id,)).fetchone()
+
+@timed("db")
+def delete_diary_entry(entry_id):
+    with get_db().transaction() as cursor:
+        cursor.execute("DELETE FROM diary_entries WHERE id = ?", (entry_id,))
+
+@timed("db")
+def update_health_log(user_id, date_str, water_ml, exercise_km, sleep_hours):
+    with get_db().transaction() as cursor:
+        cursor.execute(HEALTH_UPSERT_SQL, (user_id, date_str, water_ml, exercise_km, sleep_hours))
+
+@timed("db")
+def get_health_log(user_id, date_str):
+    log = get_db().execute(HEALTH_LOG_SQL, (user_id, date_str)).fetchone()
+    return log if log else (0, 0.0, 0.0)
+
+@timed("db")
+def get_health_logs_between(user_id, start_date_str, end_date_str):
+    return get_db().execute(HEALTH_RANGE_SQL, (user_id, start_date_str, end_date_str)).fetchall()
+
+@timed("db")
+def get_health_rollups(user_id, period="weekly", start=None, end=None):
+    table = HEALTH_ROLLUP_PERIODS[period][0]
+    return get_db().execute(f"SELECT period, days, water_ml_sum, exercise_km_sum, sleep_hours_sum FROM {table} "
+                            "WHERE user_id = ? AND period BETWEEN ? AND ? ORDER BY period",
+                            (user_id, start or "", end or "9999")).fetchall()
+
+def _aggregate_health_rollups(user_ids):
+    placeholders = ", ".join("?" * len(user_ids))
+    result = {}
+    for period, (table, period_sql) in HEALTH_ROLLUP_PERIODS.items():
+        result[period] = get_db().execute(f"""
+        SELECT user_id, {period_sql.format("log_date")}, COUNT(*), TOTAL(water_ml), TOTAL(exercise_km), TOTAL(sleep_hours)
+        FROM health_data WHERE user_id IN ({placeholders}) GROUP BY 1, 2
+        """, tuple(user_ids)).fetchall()
+    return result
+
+def _aggregate_health_rollups_in_parallel(user_ids, workers, chunk_size):
+    chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+    merged = {period: [] for period in HEALTH_ROLLUP_PERIODS}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(releases_connection(_aggregate_health_rollups), chunks):
+            for period, rows in partial.items():
+                merged[period].extend(rows)
+    return merged
+
+@timed("db")
+def rebuild_health_rollups(workers=HEALTH_ROLLUP_WORKERS, chunk_size=HEALTH_ROLLUP_CHUNK_SIZE):
+    # The write lock is held from before the workers read until the swap commits, so no
+    # health_data write can land in between and be overwritten by stale aggregates.
+    with get_db().transaction() as cursor:
+        user_ids = [row[0] for row in cursor.execute("SELECT DISTINCT user_id FROM health_data").fetchall()]
+        aggregated = _aggregate_health_rollups_in_parallel(user_ids, workers, chunk_size)
+        for period, (table, period_sql) in HEALTH_ROLLUP_PERIODS.items():
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.executemany(f"INSERT INTO {table} (user_id, period, days, water_ml_sum, exercise_km_sum, sleep_hours_sum) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", aggregated[period])
+    return {period: len(rows) for period, rows in aggregated.items()}
+
+@timed("db")
+def check_health_rollups(workers=HEALTH_ROLLUP_WORKERS, chunk_size=HEALTH_ROLLUP_CHUNK_SIZE, tolerance=1e-6):
+    user_ids = [row[0] for row in get_db().execute("SELECT DISTINCT user_id FROM health_data").fetchall()]
+    expected = _aggregate_health_rollups_in_parallel(user_ids, workers, chunk_size)
+    mismatches = []
+    for period, (table, period_sql) in HEALTH_ROLLUP_PERIODS.items():
+        stored = {(row[0], row[1]): row[2:] for row in get_db().execute(
+            f"SELECT user_id, period, days, water_ml_sum, exercise_km_sum, sleep_hours_sum FROM {table}")}
+        for row in expected[period]:
+            key, values = (row[0], row[1]), row[2:]
+            actual = stored.pop(key, None)
+            if actual is None or any(abs(a - b) > tolerance for a, b in zip(actual, values)):
+                mismatches.append((period, key[0], key[1], actual, values))
+        for key, actual in stored.items():
+            mismatches.append((period, key[0], key[1], actual, None))
+    return mismatches
+
+class WeatherCache:
+    def __init__(self, ttl=WEATHER_CACHE_TTL, stale_ttl=WEATHER_CACHE_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(city, units, lang):
+        return (city.strip().casefold(), units, lang)
+
+    @timed("db")
+    def get(self, city, units=WEATHER_UNITS, lang=WEATHER_LANG):
+        row = get_db().execute("SELECT fetched_at, payload FROM weather_cache WHERE city = ? AND units = ? AND lang = ?",
+                               self._key(city, units, lang)).fetchone()
+        age = time.time() - row[0] if row else None
+        if row is None or age >= self.stale_ttl:
+            self.misses += 1
+            return None, None, False
+        if age < self.ttl:
+            self.hits += 1
+            return json.loads(row[1]), row[0], True
+        self.stale_hits += 1
+        return json.loads(row[1]), row[0], False
+
+    @timed("db")
+    def put(self, city, data, units=WEATHER_UNITS, lang=WEATHER_LANG, fetched_at=None):
+        with get_db().transaction() as cursor:
+            cursor.execute("INSERT OR REPLACE INTO weather_cache (city, units, lang, fetched_at, payload) VALUES (?, ?, ?, ?, ?)",
+                           self._key(city, units, lang) + (fetched_at or time.time(), json.dumps(data, ensure_ascii=False)))
+
+    def stats(self):
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
+
+weather_cache = WeatherCache()
+
+FORECAST_COLUMNS = "slot, temp, feels_like, humidity, wind_speed, pop, condition, description, icon"
+FORECAST_NEAREST_SQL = (f"SELECT {FORECAST_COLUMNS} FROM weather_forecast "
+                        "WHERE city = ? AND units = ? AND lang = ? AND slot > ? AND slot < ? "
+                        "ORDER BY ABS(slot - ?) LIMIT 1")
+
+class ForecastStore:
+    def __init__(self, ttl=WEATHER_FORECAST_TTL, step=WEATHER_FORECAST_STEP):
+        self.ttl = ttl
+        self.step = step
+
+    @timed("db")
+    def put(self, city, data, units=WEATHER_UNITS, lang=WEATHER_LANG, fetched_at=None):
+        key = WeatherCache._key(city, units, lang)
+        info = data.get("city") or {}
+        rows = [key + (item["dt"], item["main"]["temp"], item["main"]["feels_like"], item["main"]["humidity"],
+                       item["wind"]["speed"], item.get("pop", 0), item["weather"][0]["main"],
+                       item["weather"][0]["description"], item["weather"][0]["icon"])
+                for item in data.get("list", [])]
+        with get_db().transaction() as cursor:
+            cursor.execute("DELETE FROM weather_forecast WHERE city = ? AND units = ? AND lang = ?", key)
+            cursor.executemany(f"INSERT INTO weather_forecast (city, units, lang, {FORECAST_COLUMNS}) "
+                               "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            cursor.execute("INSERT OR REPLACE INTO weather_forecast_sources (city, units, lang, fetched_at, name, country) "
+                           "VALUES (?, ?, ?, ?, ?, ?)",
+                           key + (fetched_at or time.time(), info.get("name", city), info.get("country", "")))
+
+    def _source(self, key):
+        return get_db().execute("SELECT fetched_at, name, country FROM weather_forecast_sources "
+                                "WHERE city = ? AND units = ? AND lang = ?", key).fetchone()
+
+    def is_fresh(self, city, units=WEATHER_UNITS, lang=WEATHER_LANG):
+        source = self._source(WeatherCache._key(city, units, lang))
+        return source is not None and time.time() - source[0] < self.ttl
+
+    @staticmethod
+    def _as_weather(source, row):
+        slot, temp, feels_like, humidity, wind_speed, pop, condition, description, icon = row
+        return {"name": source[1], "sys": {"country": source[2]}, "dt": slot, "pop": pop,
+                "main": {"temp": temp, "feels_like": feels_like, "humidity": humidity},
+                "weather": [{"main": condition, "description": description, "icon": icon}],
+                "wind": {"speed": wind_speed}}
+
+    @timed("db")
+    def current(self, city, at=None, units=WEATHER_UNITS, lang=WEATHER_LANG, allow_expired=False):
+        at = at or time.time()
+        key = WeatherCache._key(city, units, lang)
+        source = self._source(key)
+        if source is None or (not allow_expired and at - source[0] >= self.ttl):
+            return None, None
+        row = get_db().execute(FORECAST_NEAREST_SQL, key + (at - self.step, at + self.step, at)).fetchone()
+        if row is None:
+            return None, None
+        return self._as_weather(source, row), source[0]
+
+    @timed("db")
+    def upcoming(self, city, count=WEATHER_FORECAST_PREVIEW, at=None, units=WEATHER_UNITS, lang=WEATHER_LANG):
+        key = WeatherCache._key(city, units, lang)
+        source = self._source(key)
+        if source is None:
+            return []
+        rows = get_db().execute(f"SELECT {FORECAST_COLUMNS} FROM weather_forecast "
+                                "WHERE city = ? AND units = ? AND lang = ? AND slot > ? ORDER BY slot LIMIT ?",
+                                key + (at or time.time(), count)).fetchall()
+        return [self._as_weather(source, row) for row in rows]
+
+forecast_store = ForecastStore()
+
+@timed("db")
+def get_saved_cities(user_id):
+    return get_db().execute(SAVED_CITIES_SQL, (user_id,)).fetchall()
+
+@timed("db")
+def add_saved_city(user_id, city):
+    with get_db().transaction() as cursor:
+        cursor.execute("INSERT OR IGNORE INTO saved_cities (user_id, city, position) "
+                       "SELECT ?, ?, COALESCE(MAX(position), -1) + 1 FROM saved_cities WHERE user_id = ?",
+                       (user_id, city, user_id))
+        return cursor.rowcount > 0
+
+@timed("db")
+def remove_saved_city(user_id, city):
+    with get_db().transaction() as cursor:
+        cursor.execute("DELETE FROM saved_cities WHERE user_id = ? AND city = ?", (user_id, city))
+
+@timed("db")
+def set_saved_city_ids(user_id, city_ids):
+    with get_db().transaction() as cursor:
+        cursor.executemany("UPDATE saved_cities SET city_id = ? WHERE user_id = ? AND city = ?",
+                           [(city_id, user_id, city) for city, city_id in city_ids.items()])
+
+@timed("db")
+def get_weather_icon_bytes(icon_code):
+    row = get_db().execute("SELECT png FROM weather_icons WHERE icon_code = ?", (icon_code,)).fetchone()
+    return bytes(row[0]) if row else None
+
+@timed("db")
+def save_weather_icon_bytes(icon_code, png):
+    with get_db().transaction() as cursor:
+        cursor.execute("INSERT OR REPLACE INTO weather_icons (icon_code, png) VALUES (?, ?)", (icon_code, png))
+
+class HealthMonthCache:
+    def __init__(self, user_id, max_months=HEALTH_CACHE_MONTHS):
+        self.user_id = user_id
+        self.max_months = max_months
+        self._months = OrderedDict()
+
+    def get_month(self, year, month):
+        key = (year, month)
+        if key in self._months:
+            self._months.move_to_end(key)
+            return self._months[key]
+        first_day = datetime.date(year, month, 1)
+        last_day = first_day.replace(day=calendar.monthrange(year, month)[1])
+        days = {row[0]: tuple(row[1:]) for row in get_health_logs_between(self.user_id, first_day.isoformat(), last_day.isoformat())}
+        self._months[key] = days
+        if len(self._months) > self.max_months:
+            self._months.popitem(last=False)
+        return days
+
+    def get_day(self, date_str):
+        day = datetime.date.fromisoformat(date_str)
+        return self.get_month(day.year, day.month).get(date_str, (0, 0.0, 0.0))
+
+    def put_day(self, date_str, values):
+        day = datetime.date.fromisoformat(date_str)
+        month = self._months.get((day.year, day.month))
+        if month is not None:
+            month[date_str] = tuple(values)
+
+    def clear(self):
+        self._months.clear()
+
+class HealthSeries:
+    def __init__(self, start_date, days):
+        self.start_date = start_date
+        self.days = days
+        if _load_numpy() is not None:
+            self.logged = np.zeros(days, dtype=bool)
+            self.values = {metric: np.zeros(days, dtype=np.float64) for metric in HEALTH_METRICS}
+        else:
+            self.logged = array.array("b", bytes(days))
+            self.values = {metric: array.array("d", bytes(8 * days)) for metric in HEALTH_METRICS}
+
+    def dates(self):
+        return [self.start_date + datetime.timedelta(days=offset) for offset in range(self.days)]
+
+@timed("db")
+def load_health_series(user_id, start_date, end_date):
+    series = HealthSeries(start_date, max(0, (end_date - start_date).days + 1))
+    rows = get_health_logs_between(user_id, start_date.isoformat(), end_date.isoformat())
+    if not rows:
+        return series
+    offsets = [(datetime.date.fromisoformat(row[0]) - start_date).days for row in rows]
+    if np is not None:
+        offsets = np.fromiter(offsets, dtype=np.int64, count=len(offsets))
+        series.logged[offsets] = True
+        for column, metric in enumerate(HEALTH_METRICS, 1):
+            series.values[metric][offsets] = np.fromiter((row[column] or 0 for row in rows), dtype=np.float64, count=len(rows))
+    else:
+        for offset, row in zip(offsets, rows):
+            series.logged[offset] = 1
+            for column, metric in enumerate(HEALTH_METRICS, 1):
+                series.values[metric][offset] = row[column] or 0
+    return series
+
+def _rolling_mean(values, window):
+    if np is not None:
+        sums = np.concatenate(([0.0], np.cumsum(values)))
+        ends = np.arange(1, len(values) + 1)
+        starts = np.maximum(0, ends - window)
+        return (sums[ends] - sums[starts]) / (ends - starts)
+    result, running = [], 0.0
+    for index, value in enumerate(values):
+        running += value
+        if index >= window:
+            running -= values[index - window]
+        result.append(running / min(index + 1, window))
+    return array.array("d", result)
+
+def _streaks(hits):
+    if np is not None:
+        padded = np.concatenate(([0], hits.astype(np.int8), [0]))
+        edges = np.diff(padded)
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        longest = int((ends - starts).max()) if len(starts) else 0
+        current = int(ends[-1] - starts[-1]) if len(starts) and ends[-1] == len(hits) else 0
+        return current, longest
+    current = longest = 0
+    for hit in hits:
+        current = current + 1 if hit else 0
+        longest = max(longest, current)
+    return current, longest
+
+def _percentiles(values, percentiles):
+    if len(values) == 0:
+        return {p: 0.0 for p in percentiles}
+    if np is not None:
+        return dict(zip(percentiles, (float(v) for v in np.percentile(values, percentiles))))
+    ordered = sorted(values)
+    result = {}
+    for p in percentiles:
+        position = (len(ordered) - 1) * p / 100
+        lower, upper = math.floor(position), math.ceil(position)
+        result[p] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    return result
+
+def summarize_health(series, water_goal, window=HEALTH_ROLLING_WINDOW):
+    summary = {"days": series.days, "logged_days": 0, "averages": {}, "rolling": {}, "percentiles": {},
+               "water_goal": water_goal, "goal_hit_rate": 0.0, "current_streak": 0, "longest_streak": 0}
+    if series.days == 0:
+        return summary
+    if np is not None:
+        logged = series.logged
+        summary["logged_days"] = int(logged.sum())
+        for metric, values in series.values.items():
+            logged_values = values[logged]
+            summary["averages"][metric] = float(logged_values.mean()) if len(logged_values) else 0.0
+            summary["rolling"][metric] = _rolling_mean(values, window)
+            summary["percentiles"][metric] = _percentiles(logged_values, HEALTH_PERCENTILES)
+        hits = logged & (series.values["water_ml"] >= water_goal)
+        summary["goal_hit_rate"] = float(hits.sum()) / summary["logged_days"] if summary["logged_days"] else 0.0
+    else:
+        logged_indexes = [index for index, flag in enumerate(series.logged) if flag]
+        summary["logged_days"] = len(logged_indexes)
+        for metric, values in series.values.items():
+            logged_values = [values[index] for index in logged_indexes]
+            summary["averages"][metric] = sum(logged_values) / len(logged_values) if logged_values else 0.0
+            summary["rolling"][metric] = _rolling_mean(values, window)
+            summary["percentiles"][metric] = _percentiles(logged_values, HEALTH_PERCENTILES)
+        water = series.values["water_ml"]
+        hits = [bool(flag) and water[index] >= water_goal for index, flag in enumerate(series.logged)]
+        summary["goal_hit_rate"] = sum(hits) / summary["logged_days"] if summary["logged_days"] else 0.0
+    summary["current_streak"], summary["longest_streak"] = _streaks(hits)
+    return summary
+
+def _iter_query(sql, params, batch_size=TRANSFER_BATCH_SIZE):
+    cursor = get_db().connection().cursor()
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+def _read_records(fileobj, fmt):
+    if fmt == "csv":
+        yield from csv.DictReader(fileobj)
+    elif fmt == "jsonl":
+        for line in fileobj:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+
+def _export_rows(fileobj, fmt, fieldnames, rows, total, progress_callback=None):
+    if fmt not in TRANSFER_FORMATS:
+        raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(fileobj)
+        writer.writerow(fieldnames)
+    done = 0
+    reported = None
+    for row in rows:
+        if writer:
+            writer.writerow(row)
+        else:
+            fileobj.write(json.dumps(dict(zip(fieldnames, row)), ensure_ascii=False) + "\n")
+        done += 1
+        if progress_callback and done % TRANSFER_BATCH_SIZE == 0:
+            progress_callback(done, total)
+            reported = done
+    if progress_callback and done != reported:
+        progress_callback(done, total)
+    return done
+
+def _import_rows(sql, rows, batch_size=TRANSFER_BATCH_SIZE, progress_callback=None):
+    db = get_db()
+    done = 0
+    reported = None
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with db.transaction() as cursor:
+                cursor.executemany(sql, batch)
+            done += len(batch)
+            batch = []
+            if progress_callback:
+                progress_callback(done, None)
+                reported = done
+    if batch:
+        with db.transaction() as cursor:
+            cursor.executemany(sql, batch)
+        done += len(batch)
+    if progress_callback and done != reported:
+        progress_callback(done, None)
+    return done
+
+def _checked_date(value, date_format, record_number):
+    try:
+        datetime.datetime.strptime(value, date_format)
+    except (TypeError, ValueError):
+        raise ValueError(f"{record_number}. kayıtta geçersiz tarih: {value!r}") from None
+    return value
+
+def _parse_bool(value):
+    if isinstance(value, str):
+        return 1 if value.strip().lower() in ("1", "true", "evet", "yes") else 0
+    return 1 if value else 0
+
+@timed("db")
+def export_diary_entries(user_id, fileobj, fmt="jsonl", progress_callback=None):
+    total = get_db().execute("SELECT COUNT(*) FROM diary_entries WHERE user_id = ?", (user_id,)).fetchone()[0]
+    rows = _iter_query(DIARY_EXPORT_SQL, (user_id,))
+    return _export_rows(fileobj, fmt, DIARY_TRANSFER_FIELDS, rows, total, progress_callback)
+
+@timed("db")
+def export_health_logs(user_id, fileobj, fmt="jsonl", progress_callback=None):
+    total = get_db().execute("SELECT COUNT(*) FROM health_data WHERE user_id = ?", (user_id,)).fetchone()[0]
+    rows = _iter_query(HEALTH_EXPORT_SQL, (user_id,))
+    return _export_rows(fileobj, fmt, HEALTH_TRANSFER_FIELDS, rows, total, progress_callback)
+
+@timed("db")
+def import_diary_entries(user_id, fileobj, fmt="jsonl", progress_callback=None, batch_size=TRANSFER_BATCH_SIZE):
+    def rows():
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for line_number, record in enumerate(_read_records(fileobj, fmt), 1):
+            if not record.get("content"):
+                raise ValueError(f"{line_number}. kayıtta günlük içeriği eksik.")
+            entry_date = _checked_date(record["entry_date"], "%Y-%m-%d %H:%M:%S", line_number) if record.get("entry_date") else now
+            yield (user_id, entry_date, record.get("title"), record["content"],
+                   record.get("mood"), _parse_bool(record.get("is_important")))
+    return _import_rows("INSERT INTO diary_entries (user_id, entry_date, title, content, mood, is_important) VALUES (?, ?, ?, ?, ?, ?)",
+                        rows(), batch_size, progress_callback)
+
+@timed("db")
+def import_health_logs(user_id, fileobj, fmt="jsonl", progress_callback=None, batch_size=TRANSFER_BATCH_SIZE):
+    def rows():
+        for line_number, record in enumerate(_read_records(fileobj, fmt), 1):
+            if not record.get("log_date"):
+                raise ValueError(f"{line_number}. kayıtta tarih eksik.")
+            yield (user_id, _checked_date(record["log_date"], "%Y-%m-%d", line_number), int(float(record.get("water_ml") or 0)),
+                   float(record.get("exercise_km") or 0.0), float(record.get("sleep_hours") or 0.0))
+    return _import_rows(HEALTH_UPSERT_SQL, rows(), batch_size, progress_callback)